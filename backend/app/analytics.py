@@ -0,0 +1,309 @@
+"""
+Fee analytics over all courses.
+
+The sem1_fee..sem8_fee columns are held in memory as a columnar NumPy
+matrix (one contiguous column per semester) with parallel arrays for the
+course, college, category and stream, and every report is computed with
+vectorized operations over it. Rows of a new college are appended and a
+deleted college's rows are masked out, so writes never reload the table.
+
+Kept current with the other derived indexes, see cache.DerivedIndex.
+"""
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .auth import get_db
+from .cache import DerivedIndex
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+SEMESTERS = 8
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Modified z-score above which a course fee is an outlier (Iglewicz and Hoaglin)
+OUTLIER_Z = 3.5
+
+# Reports kept between writes, keyed by their filters
+REPORT_CACHE_SIZE = 32
+
+
+class Labels:
+    """Strings stored as small integer codes, code -1 for None"""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes(self, values) -> np.ndarray:
+        """Codes for a whole column, with one code() call per distinct value"""
+        mapping = {value: self.code(value) for value in set(values)}
+        return np.fromiter((mapping[v] for v in values), dtype=np.int32, count=len(values))
+
+    def find(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+
+class FeeMatrix(DerivedIndex):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._allocate(0)
+
+    def _allocate(self, capacity: int):
+        self.size = 0  # rows in use, including deleted ones
+        self.fees = np.full((capacity, SEMESTERS), np.nan, order="F")
+        self.course_ids = np.zeros(capacity, dtype=np.int64)
+        self.college_ids = np.zeros(capacity, dtype=np.int64)
+        self.categories = np.zeros(capacity, dtype=np.int32)
+        self.streams = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.category_labels = Labels()
+        self.stream_labels = Labels()
+        self._reports = {}
+
+    # -- building --------------------------------------------------------
+
+    def rebuild(self, db: Session):
+        fee_columns = [getattr(models.Course, f"sem{i}_fee") for i in range(1, SEMESTERS + 1)]
+        # Core execute on the session's connection: plain rows, no ORM row processing
+        rows = db.connection().execute(
+            select(models.Course.id, models.Course.college_id, models.Course.category, models.College.stream, *fee_columns)
+            .join(models.College, models.College.id == models.Course.college_id)
+        ).all()
+
+        # Room for new colleges before the arrays have to grow
+        self._allocate(len(rows) + 1024)
+        if not rows:
+            return
+        ids, college_ids, categories, streams, *fees = zip(*rows)
+        self.size = len(rows)
+        self.course_ids[:self.size] = ids
+        self.college_ids[:self.size] = college_ids
+        self.categories[:self.size] = self.category_labels.codes(categories)
+        self.streams[:self.size] = self.stream_labels.codes(streams)
+        for i, column in enumerate(fees):
+            # None becomes NaN
+            self.fees[:self.size, i] = np.array(column, dtype=float)
+        self.alive[:self.size] = True
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * len(self.alive), 1024)
+        for name in ("course_ids", "college_ids", "categories", "streams", "alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        fees = np.full((capacity, SEMESTERS), np.nan, order="F")
+        fees[:self.size] = self.fees[:self.size]
+        self.fees = fees
+
+    def _compact(self):
+        """Drop the rows of deleted colleges once they are a quarter of the matrix"""
+        keep = np.flatnonzero(self.alive[:self.size])
+        if self.size - len(keep) < max(self.size // 4, 1024):
+            return
+        for name in ("course_ids", "college_ids", "categories", "streams", "alive"):
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+            column[len(keep):self.size] = 0
+        self.fees[:len(keep)] = self.fees[keep]
+        self.fees[len(keep):self.size] = np.nan
+        self.size = len(keep)
+
+    def apply_saved(self, college):
+        self.apply_deleted(college.id)
+        courses = list(college.courses)
+        if self.size + len(courses) > len(self.alive):
+            self._grow(self.size + len(courses))
+
+        rows = slice(self.size, self.size + len(courses))
+        self.course_ids[rows] = [c.id for c in courses]
+        self.college_ids[rows] = college.id
+        self.categories[rows] = [self.category_labels.code(c.category) for c in courses]
+        self.streams[rows] = self.stream_labels.code(college.stream)
+        self.fees[rows] = np.array(
+            [[getattr(c, f"sem{i}_fee") for i in range(1, SEMESTERS + 1)] for c in courses], dtype=float
+        ).reshape(len(courses), SEMESTERS)
+        self.alive[rows] = True
+        self.size += len(courses)
+        self._reports = {}
+
+    def apply_deleted(self, college_id: int):
+        rows = self.college_ids[:self.size] == college_id
+        if rows.any():
+            self.alive[:self.size][rows] = False
+            self._compact()
+        self._reports = {}
+
+    # -- reports ---------------------------------------------------------
+
+    def report(self, db: Session, category: Optional[str] = None, stream: Optional[str] = None, outliers: int = 20):
+        self.ensure_current(db)
+        key = (category, stream, outliers)
+        with self.lock:
+            report = self._reports.get(key)
+            if report is None:
+                report = self._report(category, stream, outliers)
+                if len(self._reports) >= REPORT_CACHE_SIZE:
+                    self._reports.pop(next(iter(self._reports)))
+                self._reports[key] = report
+        return report
+
+    def _report(self, category, stream, outlier_limit):
+        rows = self.alive[:self.size].copy()
+        for labels, codes, value in (
+            (self.category_labels, self.categories, category),
+            (self.stream_labels, self.streams, stream),
+        ):
+            if value is not None:
+                code = labels.find(value)
+                rows &= (codes[:self.size] == code) if code is not None else False
+
+        selected = np.flatnonzero(rows)
+        fees = self.fees[selected]
+        categories = self.categories[selected]
+        streams = self.streams[selected]
+        totals = np.nansum(fees, axis=1)
+        priced = ~np.isnan(fees).all(axis=1)
+
+        # Year fees: two semesters each, NaN when both are missing
+        first, second = fees[:, 0::2], fees[:, 1::2]
+        years = np.where(np.isnan(first) & np.isnan(second), np.nan, np.nan_to_num(first) + np.nan_to_num(second))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = years[:, 1:] / years[:, :-1] - 1
+        growth[~np.isfinite(growth)] = np.nan
+
+        return {
+            "courses": int(priced.sum()),
+            "total_fee": {
+                "overall": _distribution(totals[priced]),
+                "by_category": _grouped(totals, priced, categories, self.category_labels),
+                "by_stream": _grouped(totals, priced, streams, self.stream_labels),
+            },
+            "semester_fee": {
+                f"sem{i + 1}": _distribution(fees[:, i][~np.isnan(fees[:, i])]) for i in range(SEMESTERS)
+            },
+            "year_over_year_growth": {
+                "overall": _growth(growth),
+                "by_category": {
+                    label: _growth(growth[categories == code])
+                    for code, label in enumerate(self.category_labels.values)
+                    if (categories == code).any()
+                },
+            },
+            "outliers": self._outliers(selected, totals, priced, categories, outlier_limit),
+        }
+
+    def _outliers(self, selected, totals, priced, categories, limit):
+        """Courses whose total fee is far from the median of their category (modified z-score)"""
+        scores = np.zeros(len(totals))
+        for code in np.unique(categories[priced]):
+            group = priced & (categories == code)
+            values = totals[group]
+            median = np.median(values)
+            mad = np.median(np.abs(values - median))
+            if mad > 0:
+                scores[group] = 0.6745 * (values - median) / mad
+
+        flagged = np.flatnonzero(np.abs(scores) > OUTLIER_Z)
+        top = flagged[np.argsort(-np.abs(scores[flagged]), kind="stable")[:limit]]
+        return {
+            "threshold": OUTLIER_Z,
+            "count": int(len(flagged)),
+            "courses": [
+                {
+                    "course_id": int(self.course_ids[selected[i]]),
+                    "college_id": int(self.college_ids[selected[i]]),
+                    "category": self.category_labels.values[categories[i]] if categories[i] >= 0 else None,
+                    "total_fee": round(float(totals[i]), 2),
+                    "score": round(float(scores[i]), 2),
+                }
+                for i in top
+            ],
+        }
+
+
+def _distribution(values) -> dict:
+    if not len(values):
+        return {"count": 0}
+    percentiles = np.percentile(values, PERCENTILES)
+    return {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 2),
+        "min": round(float(values.min()), 2),
+        "max": round(float(values.max()), 2),
+        **{f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, percentiles)},
+    }
+
+
+def _grouped(values, priced, codes, labels: Labels) -> dict:
+    return {
+        label: _distribution(values[priced & (codes == code)])
+        for code, label in enumerate(labels.values)
+        if (priced & (codes == code)).any()
+    }
+
+
+def _growth(growth) -> dict:
+    """Median and mean fee growth from each year to the next, as fractions"""
+    result = {}
+    for i in range(growth.shape[1]):
+        column = growth[:, i][~np.isnan(growth[:, i])]
+        if len(column):
+            result[f"year{i + 1}_to_year{i + 2}"] = {
+                "courses": int(len(column)),
+                "median": round(float(np.median(column)), 4),
+                "mean": round(float(column.mean()), 4),
+            }
+    return result
+
+
+fee_matrix = FeeMatrix()
+
+
+@router.get("/fees")
+def fee_analytics(
+    category: Optional[str] = None,
+    stream: Optional[str] = None,
+    outliers: int = Query(20, ge=0, le=200),
+    db: Session = Depends(get_db),
+):
+    """
+    Fee statistics over all courses, optionally restricted to a course category and/or college stream:
+    total fee percentiles per category and stream, per-semester fee percentiles,
+    year-over-year fee growth and the courses with outlying total fees.
+    """
+    report = fee_matrix.report(db, category, stream, outliers)
+    if not report["courses"]:
+        raise HTTPException(status_code=404, detail="No course fees found.")
+
+    # Names only for the few outliers returned
+    listed = report["outliers"]["courses"]
+    if listed:
+        names = {
+            row.id: row
+            for row in db.query(models.Course.id, models.Course.course_name, models.College.college_name)
+            .join(models.College, models.College.id == models.Course.college_id)
+            .filter(models.Course.id.in_([c["course_id"] for c in listed]))
+        }
+        listed = [
+            {**c, "course_name": names[c["course_id"]].course_name, "college_name": names[c["course_id"]].college_name}
+            for c in listed
+            if c["course_id"] in names
+        ]
+        report = {**report, "outliers": {**report["outliers"], "courses": listed}}
+    return ORJSONResponse(report)
@@ -0,0 +1,166 @@
+"""
+Prefix autocomplete over college and course names.
+
+Names are kept in sorted arrays and looked up with binary search, so a
+lookup only touches the matching range. Whole-name prefixes ("indian
+ins...") rank before prefixes of a later word in the name ("...techn"
+-> "Indian Institute of Technology"). A course name offered by several
+colleges is one suggestion, counted per college.
+
+Kept current with the other derived indexes, see cache.DerivedIndex.
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from . import models
+from .auth import get_db
+from .cache import DerivedIndex
+from .search import STOP_WORDS, TOKEN_RE
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+COLLEGE, COURSE = 0, 1  # sorts colleges before courses with the same name
+
+
+def normalize(value: str) -> str:
+    return " ".join(TOKEN_RE.findall(value.lower()))
+
+
+def word_keys(key: str):
+    """Keys starting at each later word of a name, skipping stop words"""
+    words = key.split(" ")
+    return [" ".join(words[i:]) for i in range(1, len(words)) if words[i] not in STOP_WORDS]
+
+
+class PrefixIndex(DerivedIndex):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Sorted (key, kind, label, college_id) tuples, college_id is 0 for courses
+        self._names = []
+        self._words = []
+        self._colleges = {}                 # college_id -> (college_name, course names)
+        self._course_colleges = {}          # course name -> number of colleges offering it
+
+    # -- building --------------------------------------------------------
+
+    def rebuild(self, db: Session):
+        self._colleges = {}
+        self._course_colleges = {}
+        names, words = [], []
+
+        course_names = defaultdict(set)
+        for college_id, course_name in db.query(models.Course.college_id, models.Course.course_name):
+            if course_name:
+                course_names[college_id].add(course_name)
+
+        for college_id, college_name in db.query(models.College.id, models.College.college_name):
+            courses = frozenset(course_names.get(college_id, ()))
+            self._colleges[college_id] = (college_name, courses)
+            self._collect(names, words, COLLEGE, college_name, college_id)
+            for course_name in courses:
+                self._course_colleges[course_name] = self._course_colleges.get(course_name, 0) + 1
+
+        for course_name in self._course_colleges:
+            self._collect(names, words, COURSE, course_name, 0)
+
+        names.sort()
+        words.sort()
+        self._names, self._words = names, words
+
+    @staticmethod
+    def _entries(kind, label, college_id):
+        key = normalize(label or "")
+        if not key:
+            return None, []
+        return (key, kind, label, college_id), [(k, kind, label, college_id) for k in word_keys(key)]
+
+    def _collect(self, names, words, kind, label, college_id):
+        name, later = self._entries(kind, label, college_id)
+        if name:
+            names.append(name)
+            words.extend(later)
+
+    def _insert(self, kind, label, college_id):
+        name, later = self._entries(kind, label, college_id)
+        if name:
+            insort(self._names, name)
+            for entry in later:
+                insort(self._words, entry)
+
+    def _delete(self, kind, label, college_id):
+        name, later = self._entries(kind, label, college_id)
+        if name:
+            for array, entry in [(self._names, name)] + [(self._words, e) for e in later]:
+                i = bisect_left(array, entry)
+                if i < len(array) and array[i] == entry:
+                    del array[i]
+
+    def _remove(self, college_id: int):
+        college_name, courses = self._colleges.pop(college_id, (None, ()))
+        if college_name is not None:
+            self._delete(COLLEGE, college_name, college_id)
+        for course_name in courses:
+            remaining = self._course_colleges[course_name] - 1
+            if remaining:
+                self._course_colleges[course_name] = remaining
+            else:
+                del self._course_colleges[course_name]
+                self._delete(COURSE, course_name, 0)
+
+    def apply_saved(self, college):
+        self._remove(college.id)
+        courses = frozenset(c.course_name for c in college.courses if c.course_name)
+        self._colleges[college.id] = (college.college_name, courses)
+        self._insert(COLLEGE, college.college_name, college.id)
+        for course_name in courses:
+            if course_name not in self._course_colleges:
+                self._insert(COURSE, course_name, 0)
+            self._course_colleges[course_name] = self._course_colleges.get(course_name, 0) + 1
+
+    def apply_deleted(self, college_id: int):
+        self._remove(college_id)
+
+    # -- querying --------------------------------------------------------
+
+    def suggest(self, db: Session, query: str, limit: int):
+        """Up to limit suggestions for names starting with query (or with a later word starting with it)"""
+        self.ensure_current(db)
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        suggestions, seen = [], set()
+        with self.lock:
+            for array in (self._names, self._words):
+                i = bisect_left(array, (prefix,))
+                while i < len(array) and len(suggestions) < limit and array[i][0].startswith(prefix):
+                    _, kind, label, college_id = array[i]
+                    i += 1
+                    if (kind, label, college_id) in seen:
+                        continue
+                    seen.add((kind, label, college_id))
+                    if kind == COLLEGE:
+                        suggestions.append({"type": "college", "label": label, "id": college_id})
+                    else:
+                        suggestions.append({"type": "course", "label": label, "colleges": self._course_colleges[label]})
+        return suggestions
+
+
+prefix_index = PrefixIndex()
+
+
+@router.get("/autocomplete")
+def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Suggest college and course names starting with q, for search-as-you-type.
+    Returns an empty list when nothing matches.
+    """
+    return ORJSONResponse({"query": q, "suggestions": prefix_index.suggest(db, q, limit)})
@@ -0,0 +1,253 @@
+"""
+In-process caches and indexes derived from the college tables.
+
+ReadCache holds serialized college payloads. Entries are bounded (LRU) and
+expire after a TTL. Writes in crud.py invalidate exactly the entries they
+affect in this worker and bump a shared version counter in the
+cache_versions table; other workers compare their version with it (at most
+every VERSION_CHECK_SECONDS) and drop their entries when it has moved.
+
+DerivedIndex is the base for in-memory structures built from all colleges
+(listing snapshot, search index, ...). Writes are applied incrementally
+through notify_college_saved/notify_college_deleted. A worker that sees the
+shared version move without having applied the write rebuilds from scratch
+in a background thread and keeps serving its previous copy until then.
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+VERSION_CHECK_SECONDS = float(os.getenv("CACHE_VERSION_CHECK_SECONDS", "1"))
+
+COLLEGES_SCOPE = "colleges"
+
+
+def read_version(db: Session, scope: str = COLLEGES_SCOPE) -> int:
+    return (
+        db.query(models.CacheVersion.version)
+        .filter(models.CacheVersion.name == scope)
+        .scalar()
+    ) or 0
+
+
+def bump_version(db: Session, scope: str = COLLEGES_SCOPE) -> int:
+    """Increment the shared version inside the caller's transaction and return it"""
+    updated = (
+        db.query(models.CacheVersion)
+        .filter(models.CacheVersion.name == scope)
+        .update({models.CacheVersion.version: models.CacheVersion.version + 1}, synchronize_session=False)
+    )
+    if not updated:
+        db.add(models.CacheVersion(name=scope, version=1))
+        db.flush()
+    return db.query(models.CacheVersion.version).filter(models.CacheVersion.name == scope).scalar()
+
+
+class ReadCache:
+    def __init__(self, scope=COLLEGES_SCOPE, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS,
+                 version_check_interval=VERSION_CHECK_SECONDS):
+        self.scope = scope
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = float("-inf")
+        # Bumped on every invalidation so a read that raced with a write is not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _clear(self):
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def sync_version(self, db: Session):
+        """Drop all entries if another worker changed the data since the last check"""
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check_interval:
+            return
+        version = read_version(db, self.scope)
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self._clear()
+                self._version = version
+            self._checked_at = now
+
+    def get(self, db: Session, key):
+        self.sync_version(db)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, generation: int):
+        """Store a value computed while self.generation was `generation`"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, version: int, match):
+        """
+        Drop the entries whose key satisfies match(key) after a local write
+        that bumped the shared counter to `version`.
+        """
+        with self._lock:
+            if self._version is not None and version != self._version + 1:
+                # Another worker wrote in between, its changes are unknown here
+                self._clear()
+            else:
+                for key in [k for k in self._entries if match(k)]:
+                    del self._entries[key]
+                self.generation += 1
+                self.invalidations += 1
+            self._version = version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "version": self._version,
+            }
+
+
+college_cache = ReadCache()
+
+
+def is_listing_key(key):
+    return key[0] == "list"
+
+
+def detail_key(college_id: int):
+    return ("detail", college_id)
+
+
+class DerivedIndex:
+    """
+    In-memory structure built from the college tables. Subclasses implement
+    rebuild(db), apply_saved(college) and apply_deleted(college_id), all
+    called with self.lock held. rebuild() must assign fresh containers to
+    its attributes rather than clear them in place: background rebuilds run
+    it on a shallow copy and swap the result in.
+    """
+
+    # Bookkeeping kept when a rebuilt copy is swapped in
+    _OWN_ATTRIBUTES = frozenset(("version_check_interval", "lock", "_built", "_version", "_checked_at", "_rebuilding"))
+
+    def __init__(self, version_check_interval=VERSION_CHECK_SECONDS):
+        self.version_check_interval = version_check_interval
+        self.lock = threading.RLock()
+        self._built = False
+        self._version = None
+        self._checked_at = float("-inf")
+        self._rebuilding = False
+        _derived_indexes.append(self)
+
+    def rebuild(self, db: Session):
+        raise NotImplementedError
+
+    def apply_saved(self, college):
+        raise NotImplementedError
+
+    def apply_deleted(self, college_id: int):
+        raise NotImplementedError
+
+    def ensure_current(self, db: Session):
+        """Build on first use; rebuild in the background if another worker changed the data"""
+        now = time.monotonic()
+        if self._built and now - self._checked_at < self.version_check_interval:
+            return
+        version = read_version(db)
+        with self.lock:
+            if not self._built:
+                self.rebuild(db)
+                self._built = True
+                self._version = version
+            elif version != self._version and not self._rebuilding:
+                self._rebuilding = True
+                threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+            self._checked_at = now
+
+    def _rebuild_in_background(self):
+        try:
+            with SessionLocal() as db:
+                # Read first: the data read after it is at least this recent
+                version = read_version(db)
+                with self.lock:
+                    shadow = copy.copy(self)
+                shadow.rebuild(db)
+            with self.lock:
+                # A local write may have moved past the data read above, keep the newer copy
+                if self._version is None or version >= self._version:
+                    for name, value in vars(shadow).items():
+                        if name not in self._OWN_ATTRIBUTES:
+                            setattr(self, name, value)
+                    self._version = version
+        finally:
+            with self.lock:
+                self._rebuilding = False
+                # Check again on the next read, the data may have moved on meanwhile
+                self._checked_at = float("-inf")
+
+    def _apply(self, version: int, update):
+        with self.lock:
+            if not self._built:
+                return  # Not built yet, the first read builds it
+            if version != self._version + 1:
+                # Missed another worker's write: rebuild (in the background) on the next read
+                self._checked_at = float("-inf")
+                return
+            update()
+            self._version = version
+
+
+_derived_indexes = []
+
+
+def notify_college_saved(version: int, college):
+    """Apply a committed add (college with courses loaded) at cache `version`"""
+    for index in _derived_indexes:
+        index._apply(version, lambda: index.apply_saved(college))
+
+
+def notify_college_deleted(version: int, college_id: int):
+    notify_colleges_deleted(version, [college_id])
+
+
+def notify_colleges_deleted(version: int, college_ids):
+    """Apply a committed delete of several colleges, all at cache `version`"""
+    for index in _derived_indexes:
+        def apply(index=index):
+            for college_id in college_ids:
+                index.apply_deleted(college_id)
+        index._apply(version, apply)
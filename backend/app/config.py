@@ -6,3 +6,16 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 ADMIN_EMAIL = os.getenv("Admin_email")
 ADMIN_PASSWORD = os.getenv("Admin_password")
+
+# Image storage backend: "database" (image_blobs table) or "local" (files under IMAGE_STORE_DIR)
+IMAGE_STORE = os.getenv("IMAGE_STORE", "database")
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "image_store")
+
+# Seconds between batched like count updates (see likes.flush_like_counts)
+LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", "5"))
+
+# Apply pending migrations when the app starts (see app/migrate.py). Deploys run
+# "python -m app.migrate" once instead; local SQLite databases migrate on startup.
+MIGRATE_ON_STARTUP = os.getenv(
+    "MIGRATE_ON_STARTUP", "1" if (DATABASE_URL or "").startswith("sqlite") else "0"
+).lower() in ("1", "true", "yes")
@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 import json
-from sqlalchemy.orm import Session
+import orjson
+from sqlalchemy import delete
+from sqlalchemy.orm import Session, selectinload
 from .models import College, LikedCollege, CompareCollege
-import requests
 from . import models, schemas
 from .auth import get_db
-from .schemas import college_to_out
+from .schemas import college_dict
+from .listing import ListingFilters, SORT_PATTERN, list_colleges, set_fee_aggregates
+from .validation import ValidationError, course_columns
+from .cache import college_cache, bump_version, is_listing_key, detail_key, notify_college_saved, notify_college_deleted, notify_colleges_deleted
+from .likes import toggle_like, liked_ids
+from .snapshot import listing_snapshot, view_key, snapshot_response
+from .images import get_image_store, store_image, fetch_image, ImageFetchError, variant_key, etag_for, etag_matches, CACHE_CONTROL, VARIANT_MIME
 
 # Single router with prefix to avoid accidental override
 router = APIRouter(prefix="/college", tags=["Colleges"])
 
+# Most ids accepted by the endpoints taking a comma-separated ids list
+MAX_IDS = 500
+
+
+def parse_ids(ids: str) -> list[int]:
+    """Comma-separated ids -> list of ints, duplicates dropped, order kept"""
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="'ids' must be comma-separated integers.")
+    if len(parsed) > MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_IDS} ids per request.")
+    return parsed
+
 @router.post("/", response_model=schemas.CollegeOut)
 async def add_college(
     college_name: str = Form(...),
@@ -43,15 +66,25 @@ async def add_college(
         image_mime = college_image_file.content_type
     elif college_image_url:
         try:
-            resp = requests.get(college_image_url)
-            resp.raise_for_status()
-            image_data = resp.content
-            image_mime = resp.headers.get("Content-Type", "image/jpeg")
-        except Exception:
-            raise HTTPException(status_code=400, detail="Unable to fetch image from URL.")
+            image_data, image_mime = await fetch_image(college_image_url)
+        except ImageFetchError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Database writes and image resizing block, so run them in the bounded worker thread pool
+    return await run_in_threadpool(
+        _save_college, db, college_name, address, about, price_range, stream, parsed_courses, image_data, image_mime
+    )
 
+
+def _save_college(db, college_name, address, about, price_range, stream, parsed_courses, image_data, image_mime):
     # Use a transaction so either college and all courses are saved, or none
     try:
+        # Store image bytes by content hash (identical images are stored once)
+        # and resize them into thumbnail/medium variants once, here
+        image_key, image_variants = None, None
+        if image_data:
+            image_key, image_variants = store_image(db, image_data)
+
         # Create College Entry
         new_college = models.College(
             college_name=college_name,
@@ -59,8 +92,10 @@ async def add_college(
             about=about,
             price_range=price_range,
             stream=stream,
-            college_image_data=image_data,
-            college_image_mime=image_mime
+            college_image_mime=image_mime,
+            image_size=len(image_data) if image_data else None,
+            image_hash=image_key,
+            image_variants=image_variants,
         )
         db.add(new_college)
         db.flush()  # get new_college.id without committing
@@ -70,53 +105,21 @@ async def add_college(
             # Validate all courses before adding any to avoid partial failures
             course_objects = []
             for idx, course in enumerate(parsed_courses):
-                course_name = course.get("course_name")
-                course_about = course.get("course_about")
-                course_category = course.get("category")
-
-                if not course_name or not course_category:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Course {idx + 1}: Each course must have 'course_name' and 'category'."
-                    )
-
-                if course_category not in ["UG", "PG", "Engineering"]:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Course {idx + 1} ('{course_name}'): Invalid category '{course_category}'. Must be 'UG', 'PG', or 'Engineering'."
-                    )
-
-                sem_fees = [course.get(f"sem{i}_fee") for i in range(1, 9)]
-                filled_fees = [f for f in sem_fees if f is not None]
-
-                expected_semesters = {"PG": 4, "UG": 6, "Engineering": 8}[course_category]
-                if len(filled_fees) != expected_semesters:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Course {idx + 1} ('{course_name}'): Must have exactly {expected_semesters} semester fees, got {len(filled_fees)}."
-                    )
-
+                try:
+                    columns = course_columns(idx, course)
+                except ValidationError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
                 # Create course object (but don't add to DB yet)
-                new_course = models.Course(
-                    college_id=new_college.id,
-                    course_name=course_name,
-                    course_about=course_about,
-                    sem1_fee=course.get("sem1_fee"),
-                    sem2_fee=course.get("sem2_fee"),
-                    sem3_fee=course.get("sem3_fee"),
-                    sem4_fee=course.get("sem4_fee"),
-                    sem5_fee=course.get("sem5_fee"),
-                    sem6_fee=course.get("sem6_fee"),
-                    sem7_fee=course.get("sem7_fee"),
-                    sem8_fee=course.get("sem8_fee"),
-                    category=course_category
-                )
-                course_objects.append(new_course)
+                course_objects.append(models.Course(college_id=new_college.id, **columns))
             
             # Bulk add all courses at once (more efficient)
             db.add_all(course_objects)
+            set_fee_aggregates(new_college, course_objects)
 
+        cache_version = bump_version(db)
         db.commit()
+        # A new college only changes listings, cached detail pages stay valid
+        college_cache.invalidate(cache_version, is_listing_key)
     except HTTPException:
         db.rollback()
         raise
@@ -145,20 +148,89 @@ async def add_college(
     # -----------------------------
     db.refresh(new_college)
     new_college.courses = db.query(models.Course).filter(models.Course.college_id == new_college.id).all()
+    notify_college_saved(cache_version, new_college)
 
     return schemas.college_to_out(new_college)
 
 @router.get("/", response_model=list[schemas.CollegeOut])
-def get_all_colleges(db: Session = Depends(get_db)):
+def get_all_colleges(
+    request: Request,
+    stream: Optional[str] = None,
+    category: Optional[str] = None,
+    min_fee: Optional[float] = Query(None, ge=0),
+    max_fee: Optional[float] = Query(None, ge=0),
+    q: Optional[str] = None,
+    sort: str = Query("name", pattern=SORT_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """
-    Fetch all colleges with their main details.
+    Fetch colleges with their main details.
+    - Filters: stream, course category, total course fee range (min_fee/max_fee), name substring (q).
+    - Sorting: name or fee (cheapest course, within the category if filtered), prefix with '-' for descending.
+    - Pagination: pass limit, then follow the X-Next-Cursor response header via cursor.
+    The full listing and single stream/category listings come from the pre-serialized snapshot.
     """
-    colleges = db.query(models.College).all()
-
-    if not colleges:
-        raise HTTPException(status_code=404, detail="No colleges found.")
+    snapshot_key = view_key(stream, category, min_fee, max_fee, q, sort, limit, cursor)
+    if snapshot_key:
+        view = listing_snapshot.view(db, snapshot_key)
+        if view is None:
+            raise HTTPException(status_code=404, detail="No colleges found.")
+        return snapshot_response(view, request)
+
+    cache_key = ("list", stream, category, min_fee, max_fee, q, sort, limit, cursor)
+    cached = college_cache.get(db, cache_key)
+    if cached is None:
+        generation = college_cache.generation
+        filters = ListingFilters(stream=stream, category=category, min_fee=min_fee, max_fee=max_fee, q=q)
+        colleges, next_cursor = list_colleges(db, filters, sort=sort, cursor=cursor, limit=limit)
+
+        if not colleges and cursor is None:
+            raise HTTPException(status_code=404, detail="No colleges found.")
+
+        cached = (schemas.colleges_json(colleges), next_cursor)
+        college_cache.set(cache_key, cached, generation)
+
+    body, next_cursor = cached
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/batch")
+def get_colleges_batch(
+    ids: str = Query(..., description="Comma-separated college ids"),
+    db: Session = Depends(get_db),
+):
+    """
+    Fetch several colleges by ID in one request, each in the same shape as GET /college/{college_id}.
+    Colleges come back in the requested order; ids with no college are listed under "missing".
+    """
+    college_ids = parse_ids(ids)
+    bodies = {}
+    for college_id in college_ids:
+        body = college_cache.get(db, detail_key(college_id))
+        if body is not None:
+            bodies[college_id] = body
+
+    uncached = [college_id for college_id in college_ids if college_id not in bodies]
+    if uncached:
+        generation = college_cache.generation
+        colleges = (
+            db.query(models.College)
+            .options(selectinload(models.College.courses))
+            .filter(models.College.id.in_(uncached))
+            .all()
+        )
+        for college in colleges:
+            bodies[college.id] = schemas.college_json(college)
+            college_cache.set(detail_key(college.id), bodies[college.id], generation)
 
-    return [schemas.college_to_out(college) for college in colleges]
+    # Cached detail bodies are spliced into the response as they are
+    found = [bodies[college_id] for college_id in college_ids if college_id in bodies]
+    missing = [college_id for college_id in college_ids if college_id not in bodies]
+    body = b'{"colleges":[' + b",".join(found) + b'],"missing":' + orjson.dumps(missing) + b"}"
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{college_id}", response_model=schemas.CollegeOut)
@@ -166,79 +238,141 @@ def get_college_by_id(college_id: int, db: Session = Depends(get_db)):
     """
     Fetch a single college by its ID, including all courses.
     """
-    college = db.query(models.College).filter(models.College.id == college_id).first()
+    body = college_cache.get(db, detail_key(college_id))
+    if body is None:
+        generation = college_cache.generation
+        college = (
+            db.query(models.College)
+            .options(selectinload(models.College.courses))
+            .filter(models.College.id == college_id)
+            .first()
+        )
 
-    if not college:
-        raise HTTPException(status_code=404, detail=f"College with id {college_id} not found.")
+        if not college:
+            raise HTTPException(status_code=404, detail=f"College with id {college_id} not found.")
+
+        body = schemas.college_json(college)
+        college_cache.set(detail_key(college_id), body, generation)
+
+    return Response(content=body, media_type="application/json")
 
-    return schemas.college_to_out(college)
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters of this worker's college read cache"""
+    return college_cache.stats()
 
 
 @router.get("/{college_id}/image")
-def get_college_image(college_id: int, db: Session = Depends(get_db)):
-    college = db.query(models.College).filter(models.College.id == college_id).first()
-    if not college or not college.college_image_data:
+def get_college_image(
+    college_id: int,
+    request: Request,
+    size: str = Query("original", pattern="^(original|medium|thumb)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Serve a college image. size=thumb or size=medium returns the variant
+    resized at upload time, falling back to the original if there is none.
+    """
+    image = (
+        db.query(models.College.image_hash, models.College.college_image_mime, models.College.image_variants)
+        .filter(models.College.id == college_id)
+        .first()
+    )
+    if not image or not image.image_hash:
         raise HTTPException(status_code=404, detail="Image not found")
-    return Response(content=college.college_image_data, media_type=college.college_image_mime)
 
+    key, media_type = image.image_hash, image.college_image_mime
+    if size != "original" and size in (image.image_variants or "").split(","):
+        key, media_type = variant_key(image.image_hash, size), VARIANT_MIME
+
+    # The content key is a strong ETag: revalidation never touches the image bytes
+    headers = {"ETag": etag_for(key), "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    response = get_image_store().response(db, key, media_type, headers)
+    if response is not None:
+        return response
+
+    # Not migrated into the image store yet, serve the legacy column
+    headers["ETag"] = etag_for(image.image_hash)
+    legacy = db.query(models.College.college_image_data).filter(models.College.id == college_id).scalar()
+    if not legacy:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(content=legacy, media_type=image.college_image_mime, headers=headers)
+
+
+@router.delete("/batch")
+def delete_colleges_batch(
+    ids: str = Query(..., description="Comma-separated college ids"),
+    db: Session = Depends(get_db),
+):
+    """
+    Delete several colleges and all their related data in one statement, for admin cleanup.
+    Ids with no college are listed under "missing".
+    """
+    college_ids = parse_ids(ids)
+    gone = set(db.execute(
+        delete(College).where(College.id.in_(college_ids)).returning(College.id)
+    ).scalars()) if college_ids else set()
+    if not gone:
+        return {"deleted": [], "missing": college_ids}
+
+    cache_version = bump_version(db)
+    db.commit()
+    college_cache.invalidate(cache_version, lambda key: is_listing_key(key) or (key[0] == "detail" and key[1] in gone))
+    notify_colleges_deleted(cache_version, gone)
+
+    return {
+        "deleted": [college_id for college_id in college_ids if college_id in gone],
+        "missing": [college_id for college_id in college_ids if college_id not in gone],
+    }
 
-@router.delete("/{college_id}", status_code=200)
-async def delete_college(college_id: int, db: Session = Depends(get_db)):
-    college = db.query(models.College).filter(models.College.id == college_id).first()
 
-    if not college:
+@router.delete("/{college_id}", status_code=200)
+def delete_college(college_id: int, db: Session = Depends(get_db)):
+    # One statement: the ON DELETE CASCADE foreign keys remove the college's
+    # courses, fee stats, likes and compare entries
+    college_name = db.execute(
+        delete(College).where(College.id == college_id).returning(College.college_name)
+    ).scalar()
+
+    if college_name is None:
         raise HTTPException(status_code=404, detail=f"College with id {college_id} not found.")
 
-    # SQLAlchemy will delete all related courses, liked_colleges, and compare_colleges
-    db.delete(college)
+    cache_version = bump_version(db)
     db.commit()
+    college_cache.invalidate(cache_version, lambda key: is_listing_key(key) or key == detail_key(college_id))
+    notify_college_deleted(cache_version, college_id)
 
-    return {"message": f"College '{college.college_name}' and all its related data deleted successfully."}
+    return {"message": f"College '{college_name}' and all its related data deleted successfully."}
 
 
 
 @router.post("/like/{college_id}")
-async def toggle_like_college(college_id: int, user_id: int = Form(...), db: Session = Depends(get_db)):
+def toggle_like_college(college_id: int, user_id: int = Form(...), db: Session = Depends(get_db)):
     """
     Toggle like/unlike for a college by a user.
     - If not liked → adds like.
     - If already liked → removes it (unlike).
     """
-
-    # Check if college exists
-    college = db.query(models.College).filter(models.College.id == college_id).first()
-    if not college:
-        raise HTTPException(status_code=404, detail="College not found.")
-
-    # Check if user exists
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    liked = toggle_like(db, user_id, college_id)
+    if liked is None:
+        db.rollback()
+        # Error path only: find out which one is missing
+        if not db.query(models.College.id).filter(models.College.id == college_id).first():
+            raise HTTPException(status_code=404, detail="College not found.")
         raise HTTPException(status_code=404, detail="User not found.")
+    db.commit()
 
-    # Check if already liked
-    existing_like = db.query(models.LikedCollege).filter_by(user_id=user_id, college_id=college_id).first()
-
-    if existing_like:
-        # Unlike (delete existing record)
-        db.delete(existing_like)
-        db.commit()
-        return {"message": f"User_id {user_id} unliked college_id {college_id}.", "liked": False}
-    else:
-        # Like (create new record)
-        new_like = models.LikedCollege(user_id=user_id, college_id=college_id)
-        db.add(new_like)
-        db.commit()
-        db.refresh(new_like)
+    if liked:
         return {"message": f"User_id {user_id} liked college_id {college_id}.", "liked": True}
-    
-
-
-
-    # get liked colleges by user
+    return {"message": f"User_id {user_id} unliked college_id {college_id}.", "liked": False}
 
 
 @router.get("/liked/{user_id}")
-async def get_liked_colleges(user_id: int, db: Session = Depends(get_db)):
+def get_liked_colleges(user_id: int, db: Session = Depends(get_db)):
     """
     Get all colleges liked by a specific user.
     Returns full college details with image URL (same format as POST /college).
@@ -252,6 +386,7 @@ async def get_liked_colleges(user_id: int, db: Session = Depends(get_db)):
     # Query all liked colleges
     liked_colleges = (
         db.query(models.College)
+        .options(selectinload(models.College.courses))
         .join(models.LikedCollege, models.LikedCollege.college_id == models.College.id)
         .filter(models.LikedCollege.user_id == user_id)
         .all()
@@ -260,14 +395,28 @@ async def get_liked_colleges(user_id: int, db: Session = Depends(get_db)):
     if not liked_colleges:
         return {"message": "User has not liked any colleges yet.", "liked_colleges": []}
 
-    # Convert to schema using helper
-    result = [college_to_out(college) for college in liked_colleges]
+    # Same shape as CollegeOut, serialized without building Pydantic models
+    result = [college_dict(college) for college in liked_colleges]
 
-    return {
+    return ORJSONResponse({
         "user_id": user_id,
         "total_liked": len(result),
         "liked_colleges": result
-    }
+    })
+
+
+@router.get("/liked/{user_id}/status")
+def get_liked_status(
+    user_id: int,
+    ids: str = Query(..., description="Comma-separated college ids"),
+    db: Session = Depends(get_db),
+):
+    """
+    Which of the given colleges the user has liked, e.g. to fill in the heart
+    icons on a listing page. Returns the liked ids only.
+    """
+    college_ids = parse_ids(ids)
+    return ORJSONResponse({"user_id": user_id, "liked": liked_ids(db, user_id, college_ids)})
 
 
 #  Add college to compare list
@@ -299,47 +448,129 @@ def remove_from_compare(user_id: int, college_id: int, db: Session = Depends(get
 #  Get all colleges compared by user
 @router.get("/compare/{user_id}", response_model=dict)
 def get_compared_colleges(user_id: int, db: Session = Depends(get_db)):
-    compare_entries = db.query(CompareCollege).filter_by(user_id=user_id).all()
-    if not compare_entries:
+    colleges = (
+        db.query(College)
+        .options(selectinload(College.courses))
+        .join(CompareCollege, CompareCollege.college_id == College.id)
+        .filter(CompareCollege.user_id == user_id)
+        .all()
+    )
+    if not colleges:
         return {"message": "No colleges in compare list", "compared_colleges": []}
 
-    college_ids = [entry.college_id for entry in compare_entries]
-    colleges = db.query(College).filter(College.id.in_(college_ids)).all()
-
-    #  Convert each to schema format
-    college_out_list = [college_to_out(college) for college in colleges]
+    #  Same shape as CollegeOut, serialized without building Pydantic models
+    college_out_list = [college_dict(college) for college in colleges]
 
-    return {
+    return ORJSONResponse({
         "user_id": user_id,
         "total_compared": len(college_out_list),
         "compared_colleges": college_out_list
-    }
+    })
 
 
 
+#  Aligned fee comparison of the colleges a user is comparing
+@router.get("/compare/{user_id}/matrix")
+def get_compare_matrix(user_id: int, db: Session = Depends(get_db)):
+    """
+    Comparison table for the compare page, computed from one query: courses
+    matched by name and category across the compared colleges, with their
+    semester fees, total fee and difference from the cheapest college.
+    """
+    sem_columns = [getattr(models.Course, f"sem{i}_fee") for i in range(1, 9)]
+    rows = (
+        db.query(
+            College.id, College.college_name, College.stream, College.image_hash,
+            models.Course.course_name, models.Course.category, models.Course.total_fee, *sem_columns,
+        )
+        .join(CompareCollege, CompareCollege.college_id == College.id)
+        .outerjoin(models.Course, models.Course.college_id == College.id)
+        .filter(CompareCollege.user_id == user_id)
+        .order_by(College.id, models.Course.id)
+        .all()
+    )
+    if not rows:
+        return {"message": "No colleges in compare list", "colleges": [], "rows": []}
+
+    colleges = {}
+    courses = {}  # (name, category) -> {college_id: row}
+    for row in rows:
+        colleges.setdefault(row.id, row)
+        if row.course_name is not None:
+            key = (row.course_name.strip().lower(), row.category)
+            # First course wins if a college lists the same course twice
+            courses.setdefault(key, {}).setdefault(row.id, row)
+
+    college_ids = list(colleges)
+    table = []
+    for (_, category), by_college in sorted(courses.items(), key=lambda item: (item[0][1] or "", item[0][0])):
+        fees = [[getattr(row, f"sem{i}_fee") for i in range(1, 9)] for row in by_college.values()]
+        semesters = max((i + 1 for sems in fees for i, fee in enumerate(sems) if fee is not None), default=0)
+        totals = [row.total_fee for row in by_college.values() if row.total_fee is not None]
+        cheapest = min(totals) if totals else None
+
+        cells = []
+        for college_id in college_ids:
+            row = by_college.get(college_id)
+            if row is None:
+                cells.append(None)
+                continue
+            cells.append({
+                "semester_fees": [getattr(row, f"sem{i}_fee") for i in range(1, semesters + 1)],
+                "total_fee": row.total_fee,
+                "delta": row.total_fee - cheapest if row.total_fee is not None and cheapest is not None else None,
+            })
+        table.append({
+            "course_name": next(iter(by_college.values())).course_name,
+            "category": category,
+            "semesters": semesters,
+            "offered_by": len(by_college),
+            "cheapest_college_id": next(
+                (cid for cid in college_ids if cid in by_college and by_college[cid].total_fee == cheapest), None
+            ),
+            "colleges": cells,
+        })
+
+    return ORJSONResponse({
+        "user_id": user_id,
+        "colleges": [
+            {
+                "id": college.id,
+                "college_name": college.college_name,
+                "stream": college.stream,
+                "img_url": schemas.image_url(college),
+                "course_count": sum(1 for by_college in courses.values() if college.id in by_college),
+            }
+            for college in colleges.values()
+        ],
+        "rows": table,
+    })
+
+
 @router.get("/name/{college_name}")
 def get_colleges_by_name(college_name: str, request: Request, db: Session = Depends(get_db)):
-    # Get all colleges with the same name
-    colleges = db.query(models.College).filter(models.College.college_name == college_name).all()
+    # Get all colleges with the same name, courses loaded in one extra query
+    colleges = (
+        db.query(models.College)
+        .options(selectinload(models.College.courses))
+        .filter(models.College.college_name == college_name)
+        .all()
+    )
 
     if not colleges:
         raise HTTPException(status_code=404, detail="No colleges found with this name")
 
     result = []
     for college in colleges:
-        # Get all courses for this college
-        courses = db.query(models.Course).filter(models.Course.college_id == college.id).all()
-        
         result.append({
             "college_id": college.id,
             "college_name": college.college_name,
-            "category": college.category,
             "address": college.address,
             "about": college.about,
             "stream": college.stream,
             "price_range": college.price_range,
             # Build absolute image URL based on current request
-            "college_image_url": str(request.url_for("get_college_image", college_id=college.id)) if college.college_image_data else None,
+            "college_image_url": str(request.url_for("get_college_image", college_id=college.id)) if college.has_image else None,
             "courses": [
                 {
                     "id": course.id,
@@ -354,7 +585,7 @@ def get_colleges_by_name(college_name: str, request: Request, db: Session = Depe
                     "sem6_fee": course.sem6_fee,
                     "sem7_fee": course.sem7_fee,
                     "sem8_fee": course.sem8_fee
-                } for course in courses
+                } for course in college.courses
             ]
         })
 
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import DATABASE_URL
@@ -9,13 +10,28 @@ if DATABASE_URL and DATABASE_URL.startswith("postgres"):
     # Render Postgres typically requires SSL
     connect_args["sslmode"] = "require"
 
+# Sync handlers and dependencies run in AnyIO's worker thread pool. Capping it at
+# the connection pool size keeps blocking DB calls off the event loop without
+# piling up threads that would only wait for a free connection.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+WORKER_THREADS = POOL_SIZE + MAX_OVERFLOW
+
 engine = create_engine(
     DATABASE_URL,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     pool_pre_ping=True,        # Validate connections before use to avoid timeouts
     pool_recycle=1800,         # Recycle connections every 30 minutes
     connect_args=connect_args, # SSL for Postgres when needed
 )
 
+if engine.dialect.name == "sqlite":
+    # SQLite ignores foreign keys, ON DELETE CASCADE included, unless enabled per connection
+    @event.listens_for(engine, "connect")
+    def enable_sqlite_foreign_keys(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
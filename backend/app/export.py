@@ -0,0 +1,118 @@
+"""
+Streaming export of the whole catalog as NDJSON or CSV.
+
+Colleges are read through a server-side cursor (stream_results with
+yield_per) and their courses fetched one partition of colleges at a time,
+so memory use is bounded by EXPORT_BATCH_SIZE colleges whatever the table
+size. Output is sent in chunks of about CHUNK_BYTES, gzip-compressed on
+the fly when the client accepts it. On Postgres the export runs in one
+REPEATABLE READ transaction, so it is a consistent snapshot.
+
+Both formats read back with POST /college/import (see importer.py).
+"""
+import csv
+import io
+import zlib
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from . import database, models
+from .importer import CSV_COURSE_FIELDS
+from .schemas import COURSE_OUT_FIELDS, college_dict
+from .snapshot import preferred_encoding
+from .validation import COLLEGE_FIELDS
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+EXPORT_BATCH_SIZE = 1000  # colleges per partition of the server-side cursor
+CHUNK_BYTES = 64 * 1024
+
+CSV_FIELDS = ("id", *COLLEGE_FIELDS, *CSV_COURSE_FIELDS, "total_fee")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _college_batches(connection):
+    """Lists of (college row, its course rows), EXPORT_BATCH_SIZE colleges at a time"""
+    colleges = models.College.__table__
+    courses = models.Course.__table__
+    result = connection.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(
+        select(colleges.c.id, colleges.c.image_hash, *[colleges.c[field] for field in COLLEGE_FIELDS])
+        .order_by(colleges.c.id)
+    )
+    for partition in result.partitions():
+        by_college = {college.id: [] for college in partition}
+        for course in connection.execute(
+            select(courses.c.college_id, *[courses.c[field] for field in COURSE_OUT_FIELDS])
+            .where(courses.c.college_id.in_(list(by_college)))
+            .order_by(courses.c.college_id, courses.c.id)
+        ):
+            by_college[course.college_id].append(course)
+        yield [(college, by_college[college.id]) for college in partition]
+
+
+def _ndjson_lines(batch):
+    for college, courses in batch:
+        yield orjson.dumps(college_dict(college, courses)) + b"\n"
+
+
+def _csv_lines(batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for college, courses in batch:
+        college_values = [college.id, *(getattr(college, field) for field in COLLEGE_FIELDS)]
+        # A college without courses is one row with the course columns empty
+        for course in courses or [None]:
+            course_values = [getattr(course, field) for field in (*CSV_COURSE_FIELDS, "total_fee")] if course else []
+            writer.writerow(college_values + course_values)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_chunks(fmt: str, compress: bool = False, engine=None):
+    """The export as an iterator of byte chunks"""
+    engine = engine or database.engine
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    lines = _csv_lines if fmt == "csv" else _ndjson_lines
+    pending, size = [], 0
+
+    def chunk(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        pending.append(",".join(CSV_FIELDS).encode() + b"\r\n")
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            connection = connection.execution_options(isolation_level="REPEATABLE READ")
+        for batch in _college_batches(connection):
+            for line in lines(batch):
+                pending.append(line)
+                size += len(line)
+                if size >= CHUNK_BYTES:
+                    data = chunk(b"".join(pending))
+                    pending, size = [], 0
+                    if data:
+                        yield data
+    data = chunk(b"".join(pending))
+    if compressor:
+        data += compressor.flush()
+    if data:
+        yield data
+
+
+@router.get("/export")
+def export_colleges(request: Request, format: Optional[str] = Query("ndjson", pattern="^(csv|ndjson)$")):
+    """
+    Download every college with its courses as NDJSON (one college per line, in the
+    GET /college/{college_id} shape) or CSV (one course per row). Streamed with constant
+    memory; gzip-compressed when the client sends Accept-Encoding: gzip.
+    """
+    compress = preferred_encoding(request.headers.get("accept-encoding", ""), supported=("gzip",)) == "gzip"
+    headers = {"Content-Disposition": f'attachment; filename="colleges.{format}"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_chunks(format, compress), media_type=MEDIA_TYPES[format], headers=headers)
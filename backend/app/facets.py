@@ -0,0 +1,339 @@
+"""
+Facet counts for the listing sidebar from an in-memory bitmap index.
+
+Every college gets a bit position. Streams and course categories map to a
+bitmask (a Python int) of their colleges, and fee filters are answered
+from colleges/courses sorted by fee with one precomputed mask per block,
+so a count is a few ANDs and int.bit_count() whatever the dataset size.
+The filters mean exactly what they mean for the listing (see listing.py).
+
+Kept current with the other derived indexes, see cache.DerivedIndex.
+"""
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import replace
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from . import models
+from .auth import get_db
+from .cache import DerivedIndex
+from .listing import ListingFilters
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+# Lower edges of the fee facet buckets, on the cheapest course total fee
+FEE_BUCKETS = (0, 100_000, 250_000, 500_000, 1_000_000, 2_000_000)
+
+# Target entries per block in a FeeRange
+BLOCK_SIZE = 1024
+
+# Name substring masks kept, updated in place on writes
+NAME_CACHE_SIZE = 64
+
+
+def positions_mask(positions) -> int:
+    """Bitmask with the given bit positions set"""
+    positions = list(positions)
+    if not positions:
+        return 0
+    bits = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+def fee_bucket(fee: float) -> int:
+    return max(bisect_right(FEE_BUCKETS, fee) - 1, 0)
+
+
+class FeeRange:
+    """
+    (fee, position) entries split into blocks of fee values, each block
+    with the mask of its positions, answering 'fee between lo and hi'.
+    Block bounds are fixed when built; entries are added and removed in place.
+    """
+
+    def __init__(self, entries):
+        entries = sorted(entries)
+        fees = [fee for fee, _ in entries]
+        self.bounds = [float("-inf")]  # block i holds fees in [bounds[i], bounds[i + 1])
+        for start in range(BLOCK_SIZE, len(fees), BLOCK_SIZE):
+            if fees[start] > self.bounds[-1]:
+                self.bounds.append(fees[start])
+        cuts = [0] + [bisect_left(fees, bound) for bound in self.bounds[1:]] + [len(entries)]
+        self.blocks = [entries[start:end] for start, end in zip(cuts, cuts[1:])]
+        self.masks = [positions_mask(position for _, position in block) for block in self.blocks]
+
+    def _block(self, fee: float) -> int:
+        return bisect_right(self.bounds, fee) - 1
+
+    def add(self, fee: float, position: int):
+        i = self._block(fee)
+        insort(self.blocks[i], (fee, position))
+        self.masks[i] |= 1 << position
+
+    def discard(self, fee: float, position: int):
+        i = self._block(fee)
+        block = self.blocks[i]
+        j = bisect_left(block, (fee, position))
+        if j < len(block) and block[j] == (fee, position):
+            del block[j]
+        if all(p != position for _, p in block):
+            self.masks[i] &= ~(1 << position)
+
+    def between(self, lo: Optional[float], hi: Optional[float]) -> int:
+        first = 0 if lo is None else self._block(lo)
+        last = len(self.blocks) - 1 if hi is None else self._block(hi)
+        mask = 0
+        for i in range(first, last + 1):
+            block = self.blocks[i]
+            starts_inside = lo is None or lo <= self.bounds[i]
+            ends_inside = hi is None or (i + 1 < len(self.bounds) and self.bounds[i + 1] <= hi)
+            if starts_inside and ends_inside:
+                mask |= self.masks[i]
+            else:
+                # Partial block at either end, bit by bit
+                start = 0 if lo is None else bisect_left(block, (lo,))
+                end = len(block) if hi is None else bisect_right(block, (hi, float("inf")))
+                mask |= positions_mask(position for _, position in block[start:end])
+        return mask
+
+
+class FeeScope:
+    """Fee structures over all courses, or over the courses of one category"""
+
+    def __init__(self, course_fees: dict):
+        """course_fees: college position -> total fees of its courses in the scope"""
+        self.cheapest = FeeRange((min(fees), position) for position, fees in course_fees.items())
+        self.dearest = FeeRange((max(fees), position) for position, fees in course_fees.items())
+        self.courses = FeeRange((fee, position) for position, fees in course_fees.items() for fee in fees)
+        buckets = [[] for _ in FEE_BUCKETS]
+        for position, fees in course_fees.items():
+            buckets[fee_bucket(min(fees))].append(position)
+        # FEE_BUCKETS index -> colleges whose cheapest course falls in it
+        self.buckets = [positions_mask(positions) for positions in buckets]
+
+    def add(self, position: int, fees: list):
+        self.cheapest.add(min(fees), position)
+        self.dearest.add(max(fees), position)
+        for fee in fees:
+            self.courses.add(fee, position)
+        self.buckets[fee_bucket(min(fees))] |= 1 << position
+
+    def discard(self, position: int, fees: list):
+        self.cheapest.discard(min(fees), position)
+        self.dearest.discard(max(fees), position)
+        for fee in fees:
+            self.courses.discard(fee, position)
+        self.buckets[fee_bucket(min(fees))] &= ~(1 << position)
+
+    def matching(self, min_fee: Optional[float], max_fee: Optional[float]) -> int:
+        """Colleges with a course in the scope within the fee bounds"""
+        if min_fee is not None and max_fee is not None:
+            return self.courses.between(min_fee, max_fee)
+        if max_fee is not None:
+            return self.cheapest.between(None, max_fee)
+        return self.dearest.between(min_fee, None)
+
+
+def scope_fees(record) -> dict:
+    """Fee scope (None for all courses, else the category) -> the record's course fees in it"""
+    fees = {}
+    for category, fee in record[2]:
+        fees.setdefault(None, []).append(fee)
+        if category:
+            fees.setdefault(category, []).append(fee)
+    return fees
+
+
+class FacetIndex(DerivedIndex):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._reset()
+
+    def _reset(self):
+        self._positions = {}        # college_id -> bit position
+        self._free = []             # positions of deleted colleges, reused first
+        self._records = []          # position -> (lowercase name, stream, priced courses as (category, total_fee)) or None
+        self._all = 0
+        self._streams = {}          # stream -> mask
+        self._categories = {}       # category -> mask of colleges with a priced course in it
+        self._scopes = {}           # None (all courses) or category -> FeeScope
+        self._names = {}            # lowercase substring -> mask
+
+    # -- building --------------------------------------------------------
+
+    def rebuild(self, db: Session):
+        self._reset()
+        courses = {}
+        for college_id, category, total_fee in db.query(
+            models.Course.college_id, models.Course.category, models.Course.total_fee
+        ):
+            if total_fee is not None:
+                courses.setdefault(college_id, []).append((category, total_fee))
+
+        streams, categories, fees = {}, {}, {}
+        for college_id, college_name, stream in db.query(
+            models.College.id, models.College.college_name, models.College.stream
+        ).order_by(models.College.id):
+            position = len(self._records)
+            record = self._record(college_name, stream, courses.get(college_id, ()))
+            self._records.append(record)
+            self._positions[college_id] = position
+            if stream:
+                streams.setdefault(stream, []).append(position)
+            for scope, scope_course_fees in scope_fees(record).items():
+                fees.setdefault(scope, {})[position] = scope_course_fees
+                if scope:
+                    categories.setdefault(scope, []).append(position)
+
+        # Masks built once from position lists; growing them bit by bit is quadratic
+        self._all = (1 << len(self._records)) - 1
+        self._streams = {stream: positions_mask(positions) for stream, positions in streams.items()}
+        self._categories = {category: positions_mask(positions) for category, positions in categories.items()}
+        self._scopes = {scope: FeeScope(course_fees) for scope, course_fees in fees.items()}
+
+    @staticmethod
+    def _record(college_name, stream, courses):
+        return (
+            (college_name or "").lower(),
+            stream,
+            tuple((category, fee) for category, fee in courses if fee is not None),
+        )
+
+    def _add(self, college_id, college_name, stream, courses):
+        position = self._free.pop() if self._free else len(self._records)
+        record = self._record(college_name, stream, courses)
+        if position == len(self._records):
+            self._records.append(record)
+        else:
+            self._records[position] = record
+        self._positions[college_id] = position
+
+        bit = 1 << position
+        self._all |= bit
+        if stream:
+            self._streams[stream] = self._streams.get(stream, 0) | bit
+        for scope, fees in scope_fees(record).items():
+            if scope:
+                self._categories[scope] = self._categories.get(scope, 0) | bit
+            if scope not in self._scopes:
+                self._scopes[scope] = FeeScope({})
+            self._scopes[scope].add(position, fees)
+        for needle in self._names:
+            if needle in record[0]:
+                self._names[needle] |= bit
+
+    def _remove(self, college_id: int):
+        position = self._positions.pop(college_id, None)
+        if position is None:
+            return
+        record = self._records[position]
+        self._records[position] = None
+        self._free.append(position)
+
+        bit = 1 << position
+        self._all &= ~bit
+        if record[1]:
+            self._streams[record[1]] &= ~bit
+        for scope, fees in scope_fees(record).items():
+            if scope:
+                self._categories[scope] &= ~bit
+            self._scopes[scope].discard(position, fees)
+        for needle in self._names:
+            self._names[needle] &= ~bit
+
+    def apply_saved(self, college):
+        self._remove(college.id)
+        self._add(
+            college.id, college.college_name, college.stream,
+            [(course.category, course.total_fee) for course in college.courses],
+        )
+
+    def apply_deleted(self, college_id: int):
+        self._remove(college_id)
+
+    # -- querying --------------------------------------------------------
+
+    def _name_mask(self, q: str) -> int:
+        needle = q.strip().lower()
+        mask = self._names.get(needle)
+        if mask is None:
+            mask = positions_mask(
+                position for position, record in enumerate(self._records) if record and needle in record[0]
+            )
+            if len(self._names) >= NAME_CACHE_SIZE:
+                self._names.pop(next(iter(self._names)))
+            self._names[needle] = mask
+        return mask
+
+    def _mask(self, filters: ListingFilters) -> int:
+        """Colleges matching the filters, as in listing.apply_filters"""
+        mask = self._all
+        if filters.stream:
+            mask &= self._streams.get(filters.stream, 0)
+        if filters.q and filters.q.strip():
+            mask &= self._name_mask(filters.q)
+        if filters.category:
+            mask &= self._categories.get(filters.category, 0)
+        if filters.min_fee is not None or filters.max_fee is not None:
+            scope = self._scopes.get(filters.category)
+            mask &= scope.matching(filters.min_fee, filters.max_fee) if scope else 0
+        return mask
+
+    def counts(self, db: Session, filters: ListingFilters) -> dict:
+        """
+        College counts per stream, course category and fee bucket, each with
+        every filter applied except the facet's own.
+        """
+        self.ensure_current(db)
+        with self.lock:
+            total = self._mask(filters).bit_count()
+
+            others = self._mask(replace(filters, stream=None))
+            streams = {stream: (others & mask).bit_count() for stream, mask in self._streams.items()}
+
+            others = self._mask(replace(filters, category=None, min_fee=None, max_fee=None))
+            categories = {}
+            for category in self._categories:
+                categories[category] = (others & self._mask(
+                    ListingFilters(category=category, min_fee=filters.min_fee, max_fee=filters.max_fee)
+                )).bit_count()
+
+            others = self._mask(replace(filters, min_fee=None, max_fee=None))
+            scope = self._scopes.get(filters.category)
+            buckets = [(others & mask).bit_count() for mask in scope.buckets] if scope else [0] * len(FEE_BUCKETS)
+
+        return {
+            "total": total,
+            "streams": [{"value": v, "count": c} for v, c in sorted(streams.items()) if c],
+            "categories": [{"value": v, "count": c} for v, c in sorted(categories.items()) if c],
+            "fees": [
+                {"min": lower, "max": upper, "count": count}
+                for lower, upper, count in zip(FEE_BUCKETS, FEE_BUCKETS[1:] + (None,), buckets)
+            ],
+        }
+
+
+facet_index = FacetIndex()
+
+
+@router.get("/facets")
+def get_facets(
+    stream: Optional[str] = None,
+    category: Optional[str] = None,
+    min_fee: Optional[float] = Query(None, ge=0),
+    max_fee: Optional[float] = Query(None, ge=0),
+    q: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    College counts per stream, course category and fee bucket (cheapest course)
+    for the listing sidebar. Takes the same filters as the listing; each facet
+    ignores its own filter so the other values stay visible.
+    """
+    filters = ListingFilters(stream=stream, category=category, min_fee=min_fee, max_fee=max_fee, q=q)
+    return ORJSONResponse(facet_index.counts(db, filters))
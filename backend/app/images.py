@@ -0,0 +1,234 @@
+"""
+Content-addressed image storage.
+
+Images are keyed by the sha256 of their bytes, so identical uploads are
+stored once and the key doubles as a strong ETag. Resized variants
+(see IMAGE_VARIANTS) are generated once at upload time and stored next to
+the original under "<key>-<variant>". Two backends are
+available, selected with the IMAGE_STORE setting:
+
+- "database" (default): bytes live in the image_blobs table.
+- "local": bytes live on disk under IMAGE_STORE_DIR and are served with
+  FileResponse, which streams straight from the file.
+"""
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from typing import Optional
+
+import anyio
+import httpx
+from fastapi import Response
+from fastapi.responses import FileResponse
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.orm import Session
+
+from . import models, config
+
+# Images never change for a given key, but the college they belong to can be
+# deleted, so clients revalidate with the ETag after a day.
+CACHE_CONTROL = "public, max-age=86400"
+
+# Variant name -> longest side in pixels. Variants are WebP, never upscaled.
+IMAGE_VARIANTS = {"thumb": 320, "medium": 960}
+VARIANT_MIME = "image/webp"
+VARIANT_QUALITY = 80
+
+# Limits for fetching images from a URL supplied by the admin
+FETCH_TIMEOUT = httpx.Timeout(10.0, connect=5.0)  # per connect/read
+FETCH_DEADLINE = 20.0  # whole download, so a server trickling bytes cannot hold it open
+FETCH_MAX_BYTES = 10 * 1024 * 1024
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+def content_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageStore:
+    def put(self, db: Session, key: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def exists(self, db: Session, key: str) -> bool:
+        raise NotImplementedError
+
+    def response(self, db: Session, key: str, media_type: str, headers: dict) -> Optional[Response]:
+        """Response serving the stored image, or None if the key is not stored"""
+        raise NotImplementedError
+
+
+class DatabaseImageStore(ImageStore):
+    def put(self, db, key, data):
+        if db.get(models.ImageBlob, key) is None:
+            db.add(models.ImageBlob(key=key, data=data))
+            db.flush()  # make the blob visible to later put/exists calls in this session
+
+    def exists(self, db, key):
+        return db.query(models.ImageBlob.key).filter(models.ImageBlob.key == key).first() is not None
+
+    def response(self, db, key, media_type, headers):
+        blob = db.query(models.ImageBlob.data).filter(models.ImageBlob.key == key).first()
+        if blob is None:
+            return None
+        return Response(content=blob.data, media_type=media_type, headers=headers)
+
+
+class LocalImageStore(ImageStore):
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, db, key, data):
+        path = self.path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, db, key):
+        return os.path.exists(self.path(key))
+
+    def response(self, db, key, media_type, headers):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+
+_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> ImageStore:
+    global _store
+    if _store is None:
+        if config.IMAGE_STORE == "local":
+            _store = LocalImageStore(config.IMAGE_STORE_DIR)
+        elif config.IMAGE_STORE == "database":
+            _store = DatabaseImageStore()
+        else:
+            raise ValueError(f"Unknown IMAGE_STORE '{config.IMAGE_STORE}'. Use 'database' or 'local'.")
+    return _store
+
+
+def variant_key(key: str, variant: str) -> str:
+    return f"{key}-{variant}"
+
+
+def make_variants(data: bytes) -> dict:
+    """Resize an image into every IMAGE_VARIANTS size. Returns {} if it cannot be decoded (e.g. SVG)."""
+    try:
+        image = Image.open(BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return {}
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = {}
+    for name, max_side in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, "WEBP", quality=VARIANT_QUALITY)
+        variants[name] = buffer.getvalue()
+    return variants
+
+
+def store_image(db: Session, data: bytes):
+    """
+    Store an image and its resized variants.
+    Returns (key, variants) where variants is the comma separated list of
+    generated variant names, or None if the image could not be resized.
+    """
+    store = get_image_store()
+    key = content_key(data)
+    store.put(db, key, data)
+
+    # Identical image uploaded before: reuse its variants instead of resizing again
+    existing = [name for name in IMAGE_VARIANTS if store.exists(db, variant_key(key, name))]
+    if existing:
+        return key, ",".join(existing)
+
+    variants = make_variants(data)
+    for name, variant_data in variants.items():
+        store.put(db, variant_key(key, name), variant_data)
+    return key, ",".join(variants) or None
+
+
+async def fetch_image(
+    url: str,
+    max_bytes: int = FETCH_MAX_BYTES,
+    timeout: httpx.Timeout = FETCH_TIMEOUT,
+    deadline: float = FETCH_DEADLINE,
+):
+    """
+    Download an image without blocking the event loop.
+    Returns (data, mime). Raises ImageFetchError on timeouts (per read, or
+    the whole download taking longer than deadline seconds), non-2xx
+    responses, non-image content types or bodies larger than max_bytes.
+    """
+    try:
+        with anyio.fail_after(deadline):
+            data, mime = await _download(url, max_bytes, timeout)
+    except (httpx.TimeoutException, TimeoutError):
+        raise ImageFetchError("Timed out fetching image from URL.")
+    except httpx.HTTPError:
+        raise ImageFetchError("Unable to fetch image from URL.")
+
+    if not data:
+        raise ImageFetchError("URL returned an empty image.")
+    return data, mime
+
+
+async def _download(url: str, max_bytes: int, timeout: httpx.Timeout):
+    """(data, mime) of the response, see fetch_image"""
+    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True, max_redirects=3) as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+
+            mime = response.headers.get("Content-Type", "image/jpeg").split(";")[0].strip().lower()
+            if not mime.startswith("image/"):
+                raise ImageFetchError(f"URL did not return an image (Content-Type '{mime}').")
+
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ImageFetchError(f"Image is larger than {max_bytes / (1024 * 1024):g} MB.")
+
+            # Content-Length may be missing or wrong, so enforce the limit while reading
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageFetchError(f"Image is larger than {max_bytes / (1024 * 1024):g} MB.")
+                chunks.append(chunk)
+    return b"".join(chunks), mime
+
+
+def etag_for(key: str) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against a strong ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
@@ -0,0 +1,225 @@
+"""
+Bulk import of colleges and their courses from NDJSON or CSV.
+
+NDJSON: one college per line, in the add_college shape with "courses" as
+an array, e.g. {"college_name": "...", "stream": "...", "courses": [{...}]}.
+
+CSV: one course per row with the college columns (college_name, address,
+about, price_range, stream) repeated; consecutive rows with the same
+college columns are one college. A row without course_name and category
+adds no course. Header: the college columns, course_name, course_about,
+category and sem1_fee..sem8_fee.
+
+Input is read a line at a time and written in batches of BATCH_SIZE
+colleges, each batch one transaction of multi-row INSERTs, so memory use
+does not depend on the input size. Records are validated with the
+add_college rules (see validation.py); invalid ones are skipped and
+reported with their line number. If a batch fails in the database, its
+colleges are retried one by one to find the failing rows.
+"""
+import csv
+import io
+import tempfile
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import models
+from .auth import get_db
+from .cache import bump_version, college_cache, is_listing_key
+from .listing import fee_aggregates
+from .validation import COLLEGE_FIELDS, SEM_FEE_FIELDS, ValidationError, college_columns, course_columns
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+BATCH_SIZE = 1000  # colleges per transaction
+MAX_REPORTED_ERRORS = 1000
+SPOOL_MEMORY = 8 * 2**20  # request bodies above this are spooled to disk
+
+CSV_COURSE_FIELDS = ("course_name", "course_about", "category", *SEM_FEE_FIELDS)
+
+
+def read_ndjson(lines):
+    """(line number, college record or ValidationError) per non-empty line"""
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield line_no, ValidationError("Invalid JSON.")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValidationError("Each line must be a JSON object.")
+            continue
+        yield line_no, record
+
+
+def _csv_fee(value: str):
+    if not value.strip():
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value  # reported by course_columns as not a number
+
+
+def read_csv(lines):
+    """(line number of the college's first row, college record) per group of rows"""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "college_name" not in reader.fieldnames:
+        raise ValidationError("CSV header must include 'college_name'.")
+
+    key, record, line_no = None, None, 0
+    for row in reader:
+        row_key = tuple(row.get(field) or "" for field in COLLEGE_FIELDS)
+        if row_key != key:
+            if record is not None:
+                yield line_no, record
+            key, line_no = row_key, reader.line_num
+            record = {field: row.get(field) or None for field in COLLEGE_FIELDS}
+            record["courses"] = []
+        if row.get("course_name") or row.get("category"):
+            course = {field: row.get(field) or None for field in CSV_COURSE_FIELDS[:3]}
+            course.update({field: _csv_fee(row.get(field) or "") for field in CSV_COURSE_FIELDS[3:]})
+            record["courses"].append(course)
+    if record is not None:
+        yield line_no, record
+
+
+class Importer:
+    def __init__(self, db: Session, batch_size: int = BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.colleges = 0
+        self.courses = 0
+        self.errors = []
+        self.error_count = 0
+        self._batch = []  # (line number, college columns, course columns)
+
+    def _error(self, line_no: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def add(self, line_no: int, record):
+        if isinstance(record, Exception):
+            self._error(line_no, str(record))
+            return
+        try:
+            college = college_columns(record)
+            courses = record.get("courses") or []
+            if not isinstance(courses, list):
+                raise ValidationError("'courses' must be a JSON array.")
+            courses = [course_columns(idx, course) for idx, course in enumerate(courses)]
+        except ValidationError as e:
+            self._error(line_no, str(e))
+            return
+        self._batch.append((line_no, college, courses))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        try:
+            self._insert(batch)
+        except SQLAlchemyError:
+            self.db.rollback()
+            # Retry one by one so the error lands on the row that caused it
+            for item in batch:
+                try:
+                    self._insert([item])
+                except SQLAlchemyError as e:
+                    self.db.rollback()
+                    self._error(item[0], f"Database error: {e.orig if getattr(e, 'orig', None) else e}")
+
+    def _insert(self, batch):
+        college_rows, stats_rows = [], []
+        for _, college, courses in batch:
+            overall, by_category = fee_aggregates((c["category"], c["total_fee"]) for c in courses)
+            college_rows.append({
+                **college,
+                "min_total_fee": overall[0], "max_total_fee": overall[1], "median_total_fee": overall[2],
+            })
+            stats_rows.append(by_category)
+
+        connection = self.db.connection()
+        colleges = models.College.__table__
+        college_ids = connection.execute(
+            colleges.insert().returning(colleges.c.id, sort_by_parameter_order=True), college_rows
+        ).scalars().all()
+
+        course_rows = [
+            {**course, "college_id": college_id}
+            for college_id, (_, _, courses) in zip(college_ids, batch)
+            for course in courses
+        ]
+        if course_rows:
+            connection.execute(models.Course.__table__.insert(), course_rows)
+        fee_stats = [
+            {
+                "college_id": college_id, "category": category, "course_count": count,
+                "min_total_fee": low, "max_total_fee": high, "median_total_fee": median,
+            }
+            for college_id, by_category in zip(college_ids, stats_rows)
+            for category, (count, low, high, median) in by_category.items()
+        ]
+        if fee_stats:
+            connection.execute(models.CollegeFeeStats.__table__.insert(), fee_stats)
+
+        cache_version = bump_version(self.db)
+        self.db.commit()
+        # Derived indexes see the version move and rebuild on their next read
+        college_cache.invalidate(cache_version, is_listing_key)
+        self.colleges += len(college_rows)
+        self.courses += len(course_rows)
+
+    def report(self) -> dict:
+        return {
+            "colleges": self.colleges,
+            "courses": self.courses,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def import_file(db: Session, binary_file, fmt: str, batch_size: int = BATCH_SIZE) -> dict:
+    """Import an NDJSON or CSV binary file object and return the import report"""
+    # utf-8-sig: spreadsheet CSV exports often start with a byte order mark
+    lines = io.TextIOWrapper(binary_file, encoding="utf-8-sig", errors="replace", newline="" if fmt == "csv" else None)
+    importer = Importer(db, batch_size)
+    for line_no, record in (read_csv(lines) if fmt == "csv" else read_ndjson(lines)):
+        importer.add(line_no, record)
+    importer.flush()
+    return importer.report()
+
+
+@router.post("/import")
+async def import_colleges(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk-add colleges and courses from an NDJSON or CSV request body (see importer.py for the formats).
+    The format comes from the format parameter, else from the Content-Type (text/csv or NDJSON).
+    Invalid records are skipped and listed under "errors" with their line number.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    try:
+        # Parsing and database writes block, so run them in the bounded worker thread pool
+        return await run_in_threadpool(import_file, db, spool, fmt)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        spool.close()
@@ -0,0 +1,191 @@
+"""
+Likes written in one statement, and like counts maintained in batches.
+
+The toggle deletes the user's like if it exists and otherwise inserts it,
+relying on the unique_user_college constraint instead of reading first.
+The insert only selects a row when both the user and the college exist,
+so a missing one shows up as "nothing changed" rather than an FK error.
+
+Each toggle also appends +1/-1 to like_events in the same transaction,
+and flush_like_counts() periodically folds the pending events into
+College.like_count with one UPDATE. A burst of likes on one college is a
+burst of appends, not a queue of transactions waiting on its row lock,
+and since the events are committed with the likes a crash or restart
+loses nothing: the next flush, from any worker, applies them.
+"""
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import database, models
+from .auth import get_db
+from .config import LIKE_FLUSH_INTERVAL
+from .schemas import image_url
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+# pg_try_advisory_xact_lock key: one flush at a time across workers
+FLUSH_LOCK_KEY = 0x6C696B6573  # "likes"
+
+POSTGRES_TOGGLE_SQL = text("""
+    WITH deleted AS (
+        DELETE FROM liked_colleges
+        WHERE user_id = :user_id AND college_id = :college_id
+        RETURNING 1
+    ),
+    inserted AS (
+        INSERT INTO liked_colleges (user_id, college_id)
+        SELECT u.id, c.id
+        FROM users u, colleges_1 c
+        WHERE u.id = :user_id AND c.id = :college_id AND NOT EXISTS (SELECT 1 FROM deleted)
+        ON CONFLICT ON CONSTRAINT unique_user_college DO NOTHING
+        RETURNING 1
+    ),
+    events AS (
+        INSERT INTO like_events (college_id, delta)
+        SELECT :college_id, -1 FROM deleted
+        UNION ALL
+        SELECT :college_id, 1 FROM inserted
+    )
+    SELECT EXISTS (SELECT 1 FROM deleted) AS unliked, EXISTS (SELECT 1 FROM inserted) AS liked
+""")
+
+# SQLite has no data-modifying CTEs: the same delete and insert as two statements
+SQLITE_DELETE_SQL = text("DELETE FROM liked_colleges WHERE user_id = :user_id AND college_id = :college_id RETURNING 1")
+SQLITE_INSERT_SQL = text("""
+    INSERT INTO liked_colleges (user_id, college_id)
+    SELECT u.id, c.id
+    FROM users u, colleges_1 c
+    WHERE u.id = :user_id AND c.id = :college_id
+    ON CONFLICT DO NOTHING
+    RETURNING 1
+""")
+SQLITE_EVENT_SQL = text("INSERT INTO like_events (college_id, delta) VALUES (:college_id, :delta)")
+
+
+def toggle_like(db: Session, user_id: int, college_id: int) -> Optional[bool]:
+    """
+    Like the college if the user has not, else unlike it. Returns whether it
+    is now liked, or None if the user or the college does not exist.
+    The caller commits.
+    """
+    params = {"user_id": user_id, "college_id": college_id}
+    if db.get_bind().dialect.name == "postgresql":
+        row = db.execute(POSTGRES_TOGGLE_SQL, params).one()
+        unliked, liked = row.unliked, row.liked
+    else:
+        unliked = db.execute(SQLITE_DELETE_SQL, params).first() is not None
+        liked = not unliked and db.execute(SQLITE_INSERT_SQL, params).first() is not None
+        if unliked or liked:
+            db.execute(SQLITE_EVENT_SQL, {"college_id": college_id, "delta": 1 if liked else -1})
+    if unliked or liked:
+        return liked
+
+    # Nothing changed: a concurrent request liked it first, or the user/college is missing
+    exists = db.query(models.LikedCollege.id).filter_by(user_id=user_id, college_id=college_id).first()
+    return True if exists else None
+
+
+def liked_ids(db: Session, user_id: int, college_ids) -> list:
+    """The given college ids the user has liked, ascending"""
+    if not college_ids:
+        return []
+    rows = (
+        db.query(models.LikedCollege.college_id)
+        .filter(models.LikedCollege.user_id == user_id, models.LikedCollege.college_id.in_(college_ids))
+        .order_by(models.LikedCollege.college_id)
+    )
+    return [college_id for college_id, in rows]
+
+
+# -- like counts -------------------------------------------------------------
+
+POSTGRES_FLUSH_SQL = text("""
+    WITH claimed AS (
+        DELETE FROM like_events RETURNING college_id, delta
+    ),
+    totals AS (
+        SELECT college_id, sum(delta) AS delta FROM claimed GROUP BY college_id
+    )
+    UPDATE colleges_1 c SET like_count = c.like_count + totals.delta
+    FROM totals
+    WHERE c.id = totals.college_id AND totals.delta <> 0
+""")
+
+SQLITE_FLUSH_SQL = [
+    text("""
+        UPDATE colleges_1 SET like_count = like_count + (
+            SELECT sum(delta) FROM like_events e WHERE e.college_id = colleges_1.id AND e.id <= :last_id
+        )
+        WHERE id IN (SELECT college_id FROM like_events WHERE id <= :last_id)
+    """),
+    text("DELETE FROM like_events WHERE id <= :last_id"),
+]
+
+
+def flush_like_counts(engine=None) -> int:
+    """Apply pending like events to College.like_count in one transaction. Returns the colleges updated."""
+    engine = engine or database.engine
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            # Another worker flushing already: its flush covers these events
+            if not connection.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": FLUSH_LOCK_KEY}).scalar():
+                return 0
+            return connection.execute(POSTGRES_FLUSH_SQL).rowcount
+
+        last_id = connection.execute(text("SELECT max(id) FROM like_events")).scalar()
+        if last_id is None:
+            return 0
+        update, delete = SQLITE_FLUSH_SQL
+        updated = connection.execute(update, {"last_id": last_id}).rowcount
+        connection.execute(delete, {"last_id": last_id})
+        return updated
+
+
+async def run_like_flusher(interval: float = LIKE_FLUSH_INTERVAL):
+    """Flush like counts every interval seconds until cancelled"""
+    while True:
+        await anyio.sleep(interval)
+        try:
+            await anyio.to_thread.run_sync(flush_like_counts)
+        except Exception as e:
+            # Events stay in like_events and go out with the next flush
+            print(f"⚠️  Like count flush failed: {str(e)}")
+
+
+@router.get("/popular")
+def get_most_liked(
+    stream: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Most liked colleges, optionally within a stream. Counts are updated in
+    batches, so a like shows up here within LIKE_FLUSH_INTERVAL seconds.
+    """
+    query = (
+        db.query(
+            models.College.id, models.College.college_name, models.College.address,
+            models.College.stream, models.College.image_hash, models.College.like_count,
+        )
+        .filter(models.College.like_count > 0)
+        .order_by(models.College.like_count.desc(), models.College.id)
+    )
+    if stream:
+        query = query.filter(models.College.stream == stream)
+    results = [
+        {
+            "id": college.id,
+            "college_name": college.college_name,
+            "address": college.address,
+            "stream": college.stream,
+            "img_url": image_url(college),
+            "like_count": college.like_count,
+        }
+        for college in query.limit(limit)
+    ]
+    return ORJSONResponse({"total": len(results), "results": results})
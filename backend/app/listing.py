@@ -0,0 +1,209 @@
+"""
+Server-side filtering, sorting and keyset (cursor) pagination for the college listing.
+
+Fee filters and fee sorting read the per-college aggregates (College.min/max_total_fee
+and CollegeFeeStats per category), which are maintained on write by set_fee_aggregates.
+"""
+import base64
+import json
+import statistics
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+
+from . import models
+
+SORT_PATTERN = "^-?(name|fee)$"
+
+
+@dataclass
+class ListingFilters:
+    stream: Optional[str] = None
+    category: Optional[str] = None
+    min_fee: Optional[float] = None
+    max_fee: Optional[float] = None
+    q: Optional[str] = None
+
+
+def encode_cursor(sort: str, sort_key, college_id: int) -> str:
+    raw = json.dumps([sort, sort_key, college_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """(sort key, college id) from a cursor issued for the same sort, else 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, sort_key, college_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # Name keys are strings, fee keys numbers; bool is an int but never a fee
+    key_types = (str,) if sort.lstrip("-") == "name" else (int, float)
+    if (
+        cursor_sort != sort
+        or not isinstance(sort_key, key_types) or isinstance(sort_key, bool)
+        or not isinstance(college_id, int) or isinstance(college_id, bool)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return sort_key, college_id
+
+
+def year_fees(sem_fees) -> list:
+    """Fee per year from the eight semester fees, None for years without any fee"""
+    years = []
+    for first, second in zip(sem_fees[0::2], sem_fees[1::2]):
+        years.append(None if first is None and second is None else (first or 0) + (second or 0))
+    return years
+
+
+def _aggregates(fees):
+    return min(fees), max(fees), statistics.median(fees)
+
+
+def fee_aggregates(courses):
+    """
+    Fee aggregates from (category, total_fee) pairs: the college's (min, max, median)
+    total fee, Nones without fees, and {category: (course_count, min, max, median)}
+    """
+    totals, by_category = [], {}
+    for category, total_fee in courses:
+        if total_fee is not None:
+            totals.append(total_fee)
+            if category:
+                by_category.setdefault(category, []).append(total_fee)
+    return (
+        _aggregates(totals) if totals else (None, None, None),
+        {category: (len(fees), *_aggregates(fees)) for category, fees in by_category.items()},
+    )
+
+
+def set_fee_aggregates(college, courses):
+    """Set the college's fee aggregates from its courses (total_fee already set)"""
+    overall, by_category = fee_aggregates((c.category, c.total_fee) for c in courses)
+    college.min_total_fee, college.max_total_fee, college.median_total_fee = overall
+    college.fee_stats = [
+        models.CollegeFeeStats(
+            category=category,
+            course_count=count,
+            min_total_fee=low,
+            max_total_fee=high,
+            median_total_fee=median,
+        )
+        for category, (count, low, high, median) in by_category.items()
+    ]
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def course_conditions(filters: ListingFilters) -> list:
+    """Conditions a course must meet for its college to match the filters"""
+    conditions = []
+    if filters.category:
+        conditions.append(models.Course.category == filters.category)
+    if filters.min_fee is not None:
+        conditions.append(models.Course.total_fee >= filters.min_fee)
+    if filters.max_fee is not None:
+        conditions.append(models.Course.total_fee <= filters.max_fee)
+    return conditions
+
+
+def _fee_columns(filters: ListingFilters):
+    """(min, max) total fee columns covering the filtered category"""
+    if filters.category:
+        return models.CollegeFeeStats.min_total_fee, models.CollegeFeeStats.max_total_fee
+    return models.College.min_total_fee, models.College.max_total_fee
+
+
+def apply_filters(query, filters: ListingFilters):
+    """Restrict a College query to the colleges matching the filters"""
+    if filters.stream:
+        query = query.filter(models.College.stream == filters.stream)
+    if filters.q and filters.q.strip():
+        pattern = f"%{_escape_like(filters.q.strip())}%"
+        query = query.filter(models.College.college_name.ilike(pattern, escape="\\"))
+
+    if filters.category:
+        # One stats row per college offering the category
+        query = query.join(
+            models.CollegeFeeStats,
+            and_(
+                models.CollegeFeeStats.college_id == models.College.id,
+                models.CollegeFeeStats.category == filters.category,
+            ),
+        )
+
+    # Range scans on the aggregates: some course is within max_fee iff the
+    # cheapest one is, and within min_fee iff the most expensive one is
+    min_column, max_column = _fee_columns(filters)
+    if filters.max_fee is not None:
+        query = query.filter(min_column <= filters.max_fee)
+    if filters.min_fee is not None:
+        query = query.filter(max_column >= filters.min_fee)
+    if filters.min_fee is not None and filters.max_fee is not None:
+        # With both bounds a single course must fall in between: one range
+        # scan over the (category, total_fee) index instead of a probe per college
+        matching = select(models.Course.college_id).where(*course_conditions(filters))
+        query = query.filter(models.College.id.in_(matching))
+    return query
+
+
+def _sort_columns(sort: str, filters: ListingFilters):
+    """(sort key, id tiebreaker) columns, matching an index for each case"""
+    if sort.lstrip("-") == "name":
+        return models.College.college_name, models.College.id
+
+    # Cheapest course per college (within the category, if filtered)
+    if filters.category:
+        return models.CollegeFeeStats.min_total_fee, models.CollegeFeeStats.college_id
+    if filters.min_fee is not None or filters.max_fee is not None:
+        # Never NULL here: the fee filter excludes colleges without fees
+        return models.College.min_total_fee, models.College.id
+    return models.COLLEGE_FEE_SORT_KEY, models.College.id
+
+
+def list_colleges(
+    db: Session,
+    filters: ListingFilters,
+    sort: str = "name",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Return (colleges, next_cursor) for one page of the listing.
+    Without a limit every matching college is returned and next_cursor is None.
+    """
+    key, college_id = _sort_columns(sort, filters)
+    descending = sort.startswith("-")
+
+    query = apply_filters(
+        db.query(models.College, key.label("sort_key")).options(selectinload(models.College.courses)),
+        filters,
+    )
+
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, sort)
+        row = tuple_(key, college_id)
+        query = query.filter(row < tuple_(last_key, last_id) if descending else row > tuple_(last_key, last_id))
+
+    if descending:
+        query = query.order_by(key.desc(), college_id.desc())
+    else:
+        query = query.order_by(key.asc(), college_id.asc())
+
+    if limit is None:
+        return [college for college, _ in query.all()], None
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_college, last_key = rows[-1]
+        next_cursor = encode_cursor(sort, last_key, last_college.id)
+
+    return [college for college, _ in rows], next_cursor
@@ -2,10 +2,22 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from . import models, database
+from . import database
+from .config import MIGRATE_ON_STARTUP
+from .migrate import run_migrations
 from .auth import router as auth_router
 from .crud import router as college_router
+from .search import router as search_router
+from .autocomplete import router as autocomplete_router
+from .facets import router as facets_router
+from .analytics import router as analytics_router
+from .similar import router as similar_router
+from .likes import router as likes_router, run_like_flusher, flush_like_counts
+from .importer import router as import_router
+from .export import router as export_router
 import os
+import asyncio
+import anyio
 import uvicorn
 import time
 
@@ -58,49 +70,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ----------------------------
 # Include Routers
 # ----------------------------
 app.include_router(auth_router)
+# Fixed /college/... paths go before the college router's /college/{college_id}
+app.include_router(search_router)
+app.include_router(autocomplete_router)
+app.include_router(facets_router)
+app.include_router(similar_router)
+app.include_router(likes_router)
+app.include_router(import_router)
+app.include_router(export_router)
 app.include_router(college_router)
+app.include_router(analytics_router)
 
 # ----------------------------
-# Create all tables on startup and run migrations
+# Schema migrations run once per deploy (python -m app.migrate), not on every
+# worker start; MIGRATE_ON_STARTUP runs them here, e.g. for local SQLite
 # ----------------------------
 @app.on_event("startup")
 def on_startup():
-    print("Creating all database tables (if not exist)...")
-    models.Base.metadata.create_all(bind=database.engine)
-    
-    # Migrate course_about column from VARCHAR(500) to TEXT if needed
-    try:
-        from sqlalchemy import text
-        with database.engine.connect() as connection:
-            # Check current column type
-            result = connection.execute(text("""
-                SELECT data_type, character_maximum_length 
-                FROM information_schema.columns 
-                WHERE table_name = 'courses_1' 
-                AND column_name = 'course_about'
-            """))
-            row = result.fetchone()
-            if row:
-                data_type, max_length = row
-                if data_type == 'character varying' and max_length == 500:
-                    print("Migrating course_about column from VARCHAR(500) to TEXT...")
-                    connection.execute(text("""
-                        ALTER TABLE courses_1 
-                        ALTER COLUMN course_about TYPE TEXT
-                    """))
-                    connection.commit()
-                    print("✅ Migration completed: course_about column updated to TEXT")
-                elif data_type == 'text':
-                    print("✅ course_about column is already TEXT type")
-    except Exception as e:
-        print(f"⚠️  Migration check failed (non-critical): {str(e)}")
-        # Don't fail startup if migration check fails
+    if MIGRATE_ON_STARTUP:
+        run_migrations()
+
+@app.on_event("startup")
+async def configure_worker_threads():
+    # Bound the thread pool that runs sync endpoints and DB work (see database.WORKER_THREADS)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = database.WORKER_THREADS
+
+@app.on_event("startup")
+async def start_like_flusher():
+    # Batched like count updates, see likes.flush_like_counts
+    app.state.like_flusher = asyncio.create_task(run_like_flusher())
+
+@app.on_event("shutdown")
+async def stop_like_flusher():
+    app.state.like_flusher.cancel()
+    # Apply what is pending now rather than at the next start
+    await anyio.to_thread.run_sync(flush_like_counts)
 
 # ----------------------------
 # Root endpoint
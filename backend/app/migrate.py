@@ -0,0 +1,59 @@
+"""
+Versioned schema migrations (Alembic revisions in migrations/versions/).
+
+Run once per deploy, before the new app version starts serving:
+
+    python -m app.migrate
+
+On Postgres the upgrade holds an advisory lock, so concurrent runs (e.g.
+several instances starting with MIGRATE_ON_STARTUP) apply each revision
+once: the others wait, then find the database at head.
+"""
+import os
+import time
+from logging.config import fileConfig
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from . import database
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# pg_advisory_lock key shared by every migration run
+MIGRATION_LOCK_KEY = 0x6D696772617465  # "migrate"
+
+
+def alembic_config() -> Config:
+    config = Config(ALEMBIC_INI)
+    # Absolute, so it works from any working directory
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    return config
+
+
+def run_migrations(engine=None, revision: str = "head"):
+    """Upgrade the database to `revision` under the migration lock"""
+    engine = engine or database.engine
+    config = alembic_config()
+    with engine.connect() as connection:
+        postgres = connection.dialect.name == "postgresql"
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            # The lock is held by the session, not this transaction
+            connection.commit()
+        try:
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
+        finally:
+            if postgres:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+
+
+if __name__ == "__main__":
+    # Alembic's progress output, as with the alembic command
+    fileConfig(ALEMBIC_INI)
+    start = time.perf_counter()
+    run_migrations()
+    print(f"✅ Database at head ({time.perf_counter() - start:.1f}s)")
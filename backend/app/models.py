@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, LargeBinary, ForeignKey, UniqueConstraint, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, LargeBinary, ForeignKey, UniqueConstraint, Text, Index
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import relationship, deferred
 from .database import Base
 
 class User(Base):
@@ -10,8 +11,11 @@ class User(Base):
     email = Column(String(150), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
 
-    liked_colleges = relationship("LikedCollege", back_populates="user", cascade="all, delete")
-    compare_colleges = relationship("CompareCollege", back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes: the ON DELETE CASCADE foreign keys remove the rows, nothing is loaded
+    liked_colleges = relationship("LikedCollege", back_populates="user", cascade="all, delete", passive_deletes=True)
+    compare_colleges = relationship(
+        "CompareCollege", back_populates="user", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class College(Base):
@@ -21,34 +25,77 @@ class College(Base):
     college_name = Column(String(200), nullable=False)
     address = Column(String(300), nullable=True)
     about = Column(Text, nullable=True)
-    stream = Column(String(100), nullable=True)
+    stream = Column(String(100), nullable=True, index=True)
     price_range = Column(String(100), nullable=True)
-    college_image_data = Column(LargeBinary, nullable=True)
+    # Legacy image bytes, moved into the image store by migrate_images.py
+    college_image_data = deferred(Column(LargeBinary, nullable=True))
     college_image_mime = Column(String(50), nullable=True)
+    image_size = Column(Integer, nullable=True)
+    image_hash = Column(String(64), nullable=True)  # sha256 hex of the image bytes, key in the image store
+    image_variants = Column(String(50), nullable=True)  # e.g. "thumb,medium", see images.IMAGE_VARIANTS
+
+    # Total fee of the college's courses, maintained on write (see listing.fee_aggregates)
+    min_total_fee = Column(Float, nullable=True)
+    max_total_fee = Column(Float, nullable=True)
+    median_total_fee = Column(Float, nullable=True)
+
+    # Number of users who liked the college, applied in batches (see likes.flush_like_counts)
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Keyset pagination when sorting by name
+        Index("ix_colleges_1_name_id", "college_name", "id"),
+        # Budget filtering and fee sorting across all categories
+        Index("ix_colleges_1_min_total_fee_id", "min_total_fee", "id"),
+        Index("ix_colleges_1_max_total_fee", "max_total_fee"),
+        # Most liked ranking
+        Index("ix_colleges_1_like_count_id", "like_count", "id"),
+    )
 
+    # passive_deletes: deleting a college is one DELETE, the ON DELETE CASCADE
+    # foreign keys remove its courses, likes, compares and fee stats
     courses = relationship(
         "Course",
         back_populates="college",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     liked_by_users = relationship(
         "LikedCollege",
         back_populates="college",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     compared_by_users = relationship(
         "CompareCollege",
         back_populates="college",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    fee_stats = relationship(
+        "CollegeFeeStats",
+        back_populates="college",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
+    @property
+    def has_image(self):
+        return self.image_hash is not None
+
+
+# Fee sort order: colleges without fees after every real fee. A literal rather
+# than a bound parameter, so listing queries match the expression index.
+COLLEGE_FEE_SORT_KEY = func.coalesce(College.min_total_fee, literal_column("1e18"))
+Index("ix_colleges_1_fee_sort_key_id", COLLEGE_FEE_SORT_KEY, College.id)
+
 
 class Course(Base):
     __tablename__ = "courses_1"
 
     id = Column(Integer, primary_key=True, index=True)
     
-    college_id = Column(Integer, ForeignKey("colleges_1.id", ondelete="CASCADE"))
+    college_id = Column(Integer, ForeignKey("colleges_1.id", ondelete="CASCADE"), index=True)
 
 
     course_name = Column(String(150), nullable=False)
@@ -63,10 +110,38 @@ class Course(Base):
     sem6_fee = Column(Float, nullable=True)
     sem7_fee = Column(Float, nullable=True)
     sem8_fee = Column(Float, nullable=True)
+    total_fee = Column(Float, nullable=True)  # Sum of semester fees, maintained on write
+    # Fee per year (two semesters each), maintained on write
+    year1_fee = Column(Float, nullable=True)
+    year2_fee = Column(Float, nullable=True)
+    year3_fee = Column(Float, nullable=True)
+    year4_fee = Column(Float, nullable=True)
+
+    __table_args__ = (Index("ix_courses_1_category_total_fee", "category", "total_fee"),)
 
     college = relationship("College", back_populates="courses")
 
 
+class CollegeFeeStats(Base):
+    """Per-college, per-category total fee aggregates, maintained on write"""
+    __tablename__ = "college_fee_stats"
+
+    college_id = Column(Integer, ForeignKey("colleges_1.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    course_count = Column(Integer, nullable=False)
+    min_total_fee = Column(Float, nullable=False)
+    max_total_fee = Column(Float, nullable=False)
+    median_total_fee = Column(Float, nullable=False)
+
+    # Budget filtering and fee sorting within a category
+    __table_args__ = (
+        Index("ix_college_fee_stats_category_min", "category", "min_total_fee", "college_id"),
+        Index("ix_college_fee_stats_category_max", "category", "max_total_fee"),
+    )
+
+    college = relationship("College", back_populates="fee_stats")
+
+
 class LikedCollege(Base):
     __tablename__ = "liked_colleges"
 
@@ -74,12 +149,26 @@ class LikedCollege(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     college_id = Column(Integer, ForeignKey("colleges_1.id", ondelete="CASCADE"), nullable=False)
 
-    __table_args__ = (UniqueConstraint("user_id", "college_id", name="unique_user_college"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "college_id", name="unique_user_college"),  # also serves lookups by user_id
+        # Likes of a college, and the cascade when it is deleted
+        Index("ix_liked_colleges_college_id", "college_id"),
+    )
 
     user = relationship("User", back_populates="liked_colleges")
     college = relationship("College", back_populates="liked_by_users")
 
 
+class LikeEvent(Base):
+    """A like (+1) or unlike (-1) not yet applied to College.like_count"""
+    __tablename__ = "like_events"
+
+    id = Column(Integer, primary_key=True)
+    # No foreign key: an append-only log, events of deleted colleges are dropped on flush
+    college_id = Column(Integer, nullable=False)
+    delta = Column(SmallInteger, nullable=False)
+
+
 class CompareCollege(Base):
     __tablename__ = "compare_colleges"
 
@@ -87,7 +176,25 @@ class CompareCollege(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     college_id = Column(Integer, ForeignKey("colleges_1.id", ondelete="CASCADE"), nullable=False)
 
-    __table_args__ = (UniqueConstraint("user_id", "college_id", name="unique_user_compare"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "college_id", name="unique_user_compare"),  # also serves lookups by user_id
+        # The cascade when a college is deleted
+        Index("ix_compare_colleges_college_id", "college_id"),
+    )
 
     user = relationship("User", back_populates="compare_colleges")
     college = relationship("College", back_populates="compared_by_users")
+
+
+class ImageBlob(Base):
+    __tablename__ = "image_blobs"
+
+    key = Column(String(80), primary_key=True)  # sha256 hex of the image bytes, plus "-<variant>" for variants
+    data = Column(LargeBinary, nullable=False)
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every write to the cached data
@@ -0,0 +1,86 @@
+"""
+Count SQL statements sent to the database, e.g. to lock in "no N+1 queries",
+and check that they read tables through indexes:
+
+    with assert_max_queries(2):
+        client.get("/college/")
+    with assert_indexed(["colleges_1", "courses_1"]):
+        client.get("/college/5")
+
+benchmarks/query_counts.py and benchmarks/index_usage.py hold the hot
+endpoints to them.
+"""
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from . import database
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+        self.executed = []  # (statement, parameters, executemany)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self.executed.append((statement, parameters, executemany))
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Yield a QueryCounter recording every statement executed on the engine"""
+    engine = engine or database.engine
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """Fail with the executed statements if the block runs more than `limit` queries"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        executed = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{executed}")
+
+
+def full_scans(connection, statement, parameters) -> set:
+    """Tables the statement's plan reads without an index"""
+    if connection.dialect.name == "postgresql":
+        plan = "\n".join(row[0] for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters))
+        return set(re.findall(r"Seq Scan on (\w+)", plan))
+    plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    # "SCAN t" is a full scan; "SCAN t USING [COVERING] INDEX" and "SEARCH t ..." are not
+    return {m.group(1) for *_, detail in plan for m in [re.fullmatch(r"SCAN (\w+)", detail)] if m}
+
+
+@contextmanager
+def assert_indexed(tables, engine=None):
+    """
+    Fail with the offending statements if a query in the block reads one of
+    `tables` without an index. Plans are checked (EXPLAIN) after the block.
+    """
+    engine = engine or database.engine
+    with count_queries(engine) as counter:
+        yield counter
+
+    scans = []
+    with engine.connect() as connection:
+        for statement, parameters, executemany in counter.executed:
+            if executemany or not re.match(r"\s*(SELECT|WITH|DELETE|UPDATE)", statement, re.I):
+                continue
+            scanned = full_scans(connection, statement, parameters) & set(tables)
+            if scanned:
+                scans.append(f"  {', '.join(sorted(scanned))}: {statement}")
+    if scans:
+        raise AssertionError("Full table scans:\n" + "\n".join(scans))
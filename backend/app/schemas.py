@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, HttpUrl, field_validator
 from typing import Optional, List
+import orjson
 
 # -------------------------------
 # User schemas
@@ -48,6 +49,11 @@ class CourseOut(BaseModel):
     sem6_fee: Optional[float] = None
     sem7_fee: Optional[float] = None
     sem8_fee: Optional[float] = None
+    total_fee: Optional[float] = None
+    year1_fee: Optional[float] = None
+    year2_fee: Optional[float] = None
+    year3_fee: Optional[float] = None
+    year4_fee: Optional[float] = None
     category: Optional[str] = None  
 
     class Config:
@@ -120,10 +126,6 @@ def college_to_out(college):
     """
     Convert College SQLAlchemy model to CollegeOut schema
     """
-    img = None
-    if college.college_image_data:
-        img = f"http://127.0.0.1:8000/college/{college.id}/image"
-
     return CollegeOut(
         id=college.id,
         college_name=college.college_name,
@@ -131,7 +133,7 @@ def college_to_out(college):
         about=college.about,
         stream=college.stream,
         price_range=college.price_range,
-        img_url=img,
+        img_url=image_url(college),
         courses=[
             CourseOut(
                 course_name=c.course_name,
@@ -144,8 +146,57 @@ def college_to_out(college):
                 sem6_fee=c.sem6_fee,
                 sem7_fee=c.sem7_fee,
                 sem8_fee=c.sem8_fee,
+                total_fee=c.total_fee,
+                year1_fee=c.year1_fee,
+                year2_fee=c.year2_fee,
+                year3_fee=c.year3_fee,
+                year4_fee=c.year4_fee,
                 category=c.category,  # ✅ get category from course, not college
             )
             for c in college.courses
         ]
     )
+
+
+
+# -------------------------------
+# Lean serialization: ORM objects or result rows straight to JSON bytes,
+# producing the same JSON as CollegeOut/CourseOut without building models
+# -------------------------------
+COURSE_OUT_FIELDS = tuple(CourseOut.model_fields)
+
+
+def image_url(college):
+    if college.image_hash is None:
+        return None
+    return f"http://127.0.0.1:8000/college/{college.id}/image"
+
+
+def course_dict(course):
+    return {field: getattr(course, field) for field in COURSE_OUT_FIELDS}
+
+
+def college_dict(college, courses=None):
+    """
+    CollegeOut-shaped dict for a College model or any row with the same
+    attributes. Pass courses when they were loaded separately (e.g. as rows).
+    """
+    return {
+        "id": college.id,
+        "college_name": college.college_name,
+        "address": college.address,
+        "about": college.about,
+        "stream": college.stream,
+        "price_range": college.price_range,
+        "img_url": image_url(college),
+        "courses": [course_dict(c) for c in (college.courses if courses is None else courses)],
+    }
+
+
+def college_json(college) -> bytes:
+    return orjson.dumps(college_dict(college))
+
+
+def colleges_json(colleges) -> bytes:
+    """JSON body of a list[CollegeOut] response"""
+    return orjson.dumps([college_dict(college) for college in colleges])
@@ -0,0 +1,305 @@
+"""
+Ranked, typo-tolerant search over colleges and their courses.
+
+On Postgres the search runs in SQL: full-text search (GIN indexes over
+to_tsvector expressions, see the baseline migration) for word matches and
+pg_trgm word similarity on college and course names for typos. Without the
+pg_trgm extension (it is optional in the migration) only full-text search
+runs. Elsewhere (e.g. SQLite in local development) an in-process inverted
+index is used, kept current like the other derived indexes (see
+cache.DerivedIndex).
+"""
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import models
+from .auth import get_db
+from .cache import DerivedIndex
+from .schemas import image_url
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+# Field weights shared by both backends
+COLLEGE_FIELD_WEIGHTS = {"college_name": 3.0, "stream": 2.0, "address": 1.0, "about": 0.5}
+COURSE_FIELD_WEIGHTS = {"course_name": 2.0, "course_about": 0.5}
+
+# Score multipliers for non-exact term matches
+PREFIX_MATCH = 0.8
+FUZZY_MATCH = 0.6
+
+STOP_WORDS = frozenset("a an and at by for in of on or the to with".split())
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(value: Optional[str]):
+    if not value:
+        return []
+    return [t for t in TOKEN_RE.findall(value.lower()) if len(t) > 1 and t not in STOP_WORDS]
+
+
+def trigrams(term: str):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def within_edit_distance(a: str, b: str, limit: int) -> bool:
+    """
+    Optimal string alignment distance(a, b) <= limit: Levenshtein plus swaps
+    of adjacent letters ("alpah" -> "alpha") as one edit. Stops early once it
+    cannot be.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        # A swap reaches back two rows, so both must be past the limit
+        if min(current) > limit and min(previous) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+def max_typos(term: str) -> int:
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+class InvertedIndex(DerivedIndex):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._postings = {}             # term -> {college_id: weight}
+        self._college_terms = {}        # college_id -> set of terms, for removal
+        self._vocabulary = []           # sorted terms, for prefix matches
+        self._trigram_terms = defaultdict(set)  # trigram -> terms, for typo candidates
+
+    # -- building --------------------------------------------------------
+
+    def rebuild(self, db: Session):
+        self._postings, self._college_terms = {}, {}
+        self._vocabulary, self._trigram_terms = [], defaultdict(set)
+
+        colleges = db.query(*[getattr(models.College, f) for f in ("id", *COLLEGE_FIELD_WEIGHTS)]).all()
+        courses = defaultdict(list)
+        for row in db.query(models.Course.college_id, *[getattr(models.Course, f) for f in COURSE_FIELD_WEIGHTS]):
+            courses[row.college_id].append(row)
+
+        for college in colleges:
+            self._add(college, courses.get(college.id, []), update_vocabulary=False)
+        self._vocabulary = sorted(self._postings)
+
+    def _add(self, college, courses, update_vocabulary=True):
+        college_id = college.id
+        weights = {}
+        for field, weight in COLLEGE_FIELD_WEIGHTS.items():
+            for term in tokenize(getattr(college, field)):
+                weights[term] = weights.get(term, 0) + weight
+        for course in courses:
+            for field, weight in COURSE_FIELD_WEIGHTS.items():
+                for term in set(tokenize(getattr(course, field))):
+                    weights[term] = weights.get(term, 0) + weight
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if update_vocabulary:
+                    self._vocabulary.insert(bisect_left(self._vocabulary, term), term)
+                for gram in trigrams(term):
+                    self._trigram_terms[gram].add(term)
+            postings[college_id] = weight
+        self._college_terms[college_id] = set(weights)
+
+    def _remove(self, college_id: int):
+        for term in self._college_terms.pop(college_id, ()):
+            postings = self._postings[term]
+            postings.pop(college_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+                for gram in trigrams(term):
+                    self._trigram_terms[gram].discard(term)
+
+    def apply_saved(self, college):
+        self._remove(college.id)
+        self._add(college, college.courses)
+
+    def apply_deleted(self, college_id: int):
+        self._remove(college_id)
+
+    # -- querying --------------------------------------------------------
+
+    def _expand(self, token: str, is_last: bool):
+        """Index terms matching a query token, with their score multiplier"""
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if is_last:
+            # Search-as-you-type: the last token may be an unfinished word
+            i = bisect_left(self._vocabulary, token)
+            while i < len(self._vocabulary) and self._vocabulary[i].startswith(token) and len(matches) < 50:
+                matches.setdefault(self._vocabulary[i], PREFIX_MATCH)
+                i += 1
+        if not matches and max_typos(token):
+            limit = max_typos(token)
+            grams = trigrams(token)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._trigram_terms.get(gram, ()))
+            # One edit changes at most 4 trigrams (3, or 4 for a swap), so closer terms share at least this many
+            min_shared = len(grams) - 4 * limit
+            for term, count in shared.most_common(200):
+                if count >= min_shared and within_edit_distance(token, term, limit):
+                    matches[term] = FUZZY_MATCH
+        return matches
+
+    def search(self, db: Session, query: str, limit: int):
+        """[(college_id, score)] best first"""
+        self.ensure_current(db)
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self.lock:
+            total = max(len(self._college_terms), 1)
+            scores, matched = Counter(), Counter()
+            for position, token in enumerate(tokens):
+                best = {}
+                for term, factor in self._expand(token, position == len(tokens) - 1).items():
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    for college_id, weight in postings.items():
+                        score = weight * idf * factor
+                        if score > best.get(college_id, 0):
+                            best[college_id] = score
+                for college_id, score in best.items():
+                    scores[college_id] += score
+                    matched[college_id] += 1
+
+        # Colleges matching more of the query words always rank first
+        ranked = sorted(scores, key=lambda cid: (-matched[cid], -scores[cid], cid))
+        return [(cid, round(scores[cid], 4)) for cid in ranked[:limit]]
+
+
+search_index = InvertedIndex()
+
+
+# Must match the expression indexes created in migrations/versions/0001_baseline.py
+COLLEGE_TSVECTOR = (
+    "to_tsvector('english', coalesce(college_name, '') || ' ' || coalesce(stream, '') || ' ' "
+    "|| coalesce(address, '') || ' ' || coalesce(about, ''))"
+)
+COURSE_TSVECTOR = "to_tsvector('english', coalesce(course_name, '') || ' ' || coalesce(course_about, ''))"
+
+FULLTEXT_HITS = f"""
+        SELECT c.id AS college_id, ts_rank({COLLEGE_TSVECTOR}, q.query) * 2 AS score
+        FROM colleges_1 c, q
+        WHERE {COLLEGE_TSVECTOR} @@ q.query
+        UNION ALL
+        SELECT co.college_id, max(ts_rank({COURSE_TSVECTOR}, q.query))
+        FROM courses_1 co, q
+        WHERE {COURSE_TSVECTOR} @@ q.query
+        GROUP BY co.college_id"""
+
+# Needs pg_trgm
+TRIGRAM_HITS = f"""
+        SELECT c.id, word_similarity(:q, c.college_name) * {FUZZY_MATCH}
+        FROM colleges_1 c
+        WHERE :q <% c.college_name
+        UNION ALL
+        SELECT co.college_id, max(word_similarity(:q, co.course_name)) * {FUZZY_MATCH}
+        FROM courses_1 co
+        WHERE :q <% co.course_name
+        GROUP BY co.college_id"""
+
+
+def _postgres_search_sql(hits: str):
+    return text(f"""
+    WITH q AS (SELECT websearch_to_tsquery('english', :q) AS query),
+    hits AS ({hits}
+    )
+    SELECT college_id, sum(score) AS score
+    FROM hits
+    GROUP BY college_id
+    ORDER BY score DESC, college_id
+    LIMIT :limit
+""")
+
+
+POSTGRES_SEARCH_SQL = _postgres_search_sql(FULLTEXT_HITS + "\n        UNION ALL" + TRIGRAM_HITS)
+POSTGRES_FULLTEXT_SEARCH_SQL = _postgres_search_sql(FULLTEXT_HITS)
+
+_trigram_functions = {}  # engine -> whether pg_trgm's functions resolve
+
+
+def has_trigram_functions(db: Session) -> bool:
+    """
+    Whether pg_trgm is usable from the session's search_path. Checked once per
+    worker and engine; installing the extension later takes a restart.
+    """
+    bind = db.get_bind()
+    available = _trigram_functions.get(bind)
+    if available is None:
+        available = _trigram_functions[bind] = db.execute(
+            text("SELECT to_regprocedure('word_similarity(text, text)') IS NOT NULL")
+        ).scalar()
+    return available
+
+
+def search_colleges(db: Session, query: str, limit: int):
+    """[(college_id, score)] best first, using the backend for the database in use"""
+    if db.get_bind().dialect.name == "postgresql":
+        sql = POSTGRES_SEARCH_SQL if has_trigram_functions(db) else POSTGRES_FULLTEXT_SEARCH_SQL
+        rows = db.execute(sql, {"q": query, "limit": limit}).all()
+        return [(row.college_id, round(float(row.score), 4)) for row in rows]
+    return search_index.search(db, query, limit)
+
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Search colleges by name, address, about text, stream and course names/descriptions.
+    Results are ranked by relevance and tolerate small typos.
+    """
+    hits = search_colleges(db, q.strip(), limit)
+    if not hits:
+        raise HTTPException(status_code=404, detail="No colleges match your search.")
+
+    colleges = {
+        college.id: college
+        for college in db.query(
+            models.College.id, models.College.college_name, models.College.address,
+            models.College.stream, models.College.image_hash,
+        ).filter(models.College.id.in_([college_id for college_id, _ in hits]))
+    }
+    results = [
+        {
+            "id": college_id,
+            "college_name": colleges[college_id].college_name,
+            "address": colleges[college_id].address,
+            "stream": colleges[college_id].stream,
+            "img_url": image_url(colleges[college_id]),
+            "score": score,
+        }
+        for college_id, score in hits
+        if college_id in colleges
+    ]
+    return ORJSONResponse({"query": q, "total": len(results), "results": results})
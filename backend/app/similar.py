@@ -0,0 +1,265 @@
+"""
+"Similar colleges" recommendations.
+
+Every college is a row in a dense float32 feature matrix built from the
+same College/Course rows the listing serializes:
+
+- stream (hashed one-hot)
+- course mix: share of each category plus hashed course name words
+- fee profile: median total fee as a soft one-hot over log-spaced bins
+- about text: hashed TF-IDF (IDF fixed when the matrix is built)
+
+Each block is L2-normalized and scaled by the square root of its weight,
+so the dot product of two rows is the weighted sum of the per-block cosine
+similarities. A lookup is one matrix-vector product plus argpartition.
+New colleges are written into spare rows and deleted ones are masked out.
+
+Kept current with the other derived indexes, see cache.DerivedIndex.
+"""
+import math
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from . import models
+from .auth import get_db
+from .cache import DerivedIndex
+from .schemas import image_url
+from .search import tokenize
+
+router = APIRouter(prefix="/college", tags=["Colleges"])
+
+CATEGORIES = ("UG", "PG", "Engineering")
+
+# Block name -> (dimensions, weight)
+BLOCKS = {
+    "stream": (16, 0.3),
+    "courses": (32, 0.3),
+    "fee": (8, 0.2),
+    "about": (72, 0.2),
+}
+DIMENSIONS = sum(size for size, _ in BLOCKS.values())
+
+# Fee bins, log-spaced over total course fees
+FEE_LOW, FEE_HIGH = math.log(50_000), math.log(5_000_000)
+
+
+@lru_cache(maxsize=65536)
+def _hash(token: str, size: int) -> int:
+    # crc32 rather than hash(): stable across processes
+    return zlib.crc32(token.encode()) % size
+
+
+def _normalized(vector: np.ndarray, weight: float) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector * (math.sqrt(weight) / norm) if norm else vector
+
+
+def _stream_block(stream):
+    size, _ = BLOCKS["stream"]
+    block = np.zeros(size, dtype=np.float32)
+    if stream:
+        block[_hash(stream.strip().lower(), size)] = 1
+    return block
+
+
+@lru_cache(maxsize=65536)
+def _course_name_buckets(course_name) -> tuple:
+    size, _ = BLOCKS["courses"]
+    return tuple(len(CATEGORIES) + _hash(token, size - len(CATEGORIES)) for token in tokenize(course_name))
+
+
+def _course_block(courses):
+    """courses: [(category, course_name)]"""
+    size, _ = BLOCKS["courses"]
+    # Plain list while accumulating, element-wise numpy updates are slow
+    block = [0.0] * size
+    share = 1 / len(courses) if courses else 0
+    for category, course_name in courses:
+        if category in CATEGORIES:
+            block[CATEGORIES.index(category)] += share
+        for bucket in _course_name_buckets(course_name):
+            block[bucket] += share / 2
+    return np.array(block, dtype=np.float32)
+
+
+def _fee_block(median_fee):
+    size, _ = BLOCKS["fee"]
+    block = np.zeros(size, dtype=np.float32)
+    if median_fee:
+        # Split between the two nearest bins so close fees overlap
+        position = (math.log(max(median_fee, 1)) - FEE_LOW) / (FEE_HIGH - FEE_LOW) * (size - 1)
+        position = min(max(position, 0), size - 1)
+        lower = int(position)
+        block[lower] = 1 - (position - lower)
+        if lower + 1 < size:
+            block[lower + 1] = position - lower
+    return block
+
+
+def _about_terms(about):
+    size, _ = BLOCKS["about"]
+    return Counter(_hash(token, size) for token in tokenize(about))
+
+
+def _about_block(terms: Counter, idf: np.ndarray):
+    size, _ = BLOCKS["about"]
+    block = np.zeros(size, dtype=np.float32)
+    if terms:
+        buckets = np.fromiter(terms.keys(), dtype=np.int64, count=len(terms))
+        counts = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+        block[buckets] = (1 + np.log(counts)) * idf[buckets]
+    return block
+
+
+class SimilarityIndex(DerivedIndex):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._allocate(0)
+
+    def _allocate(self, capacity: int):
+        self.matrix = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        self.college_ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self._rows = {}  # college_id -> row
+        self._free = []
+        self._idf = np.ones(BLOCKS["about"][0], dtype=np.float32)
+
+    def _vector(self, stream, courses, median_fee, about_terms) -> np.ndarray:
+        blocks = {
+            "stream": _stream_block(stream),
+            "courses": _course_block(courses),
+            "fee": _fee_block(median_fee),
+            "about": _about_block(about_terms, self._idf),
+        }
+        return np.concatenate([_normalized(blocks[name], weight) for name, (_, weight) in BLOCKS.items()])
+
+    # -- building --------------------------------------------------------
+
+    def rebuild(self, db: Session):
+        courses = {}
+        for college_id, category, course_name in db.query(
+            models.Course.college_id, models.Course.category, models.Course.course_name
+        ):
+            courses.setdefault(college_id, []).append((category, course_name))
+        colleges = db.query(
+            models.College.id, models.College.stream, models.College.about, models.College.median_total_fee
+        ).all()
+
+        # Room for new colleges before the matrix has to grow
+        self._allocate(len(colleges) + 1024)
+        terms = [_about_terms(college.about) for college in colleges]
+        document_frequency = np.zeros(BLOCKS["about"][0])
+        for college_terms in terms:
+            document_frequency[list(college_terms)] += 1
+        self._idf = np.log((1 + len(colleges)) / (1 + document_frequency)).astype(np.float32) + 1
+
+        for row, (college, college_terms) in enumerate(zip(colleges, terms)):
+            self.matrix[row] = self._vector(
+                college.stream, courses.get(college.id, ()), college.median_total_fee, college_terms
+            )
+            self.college_ids[row] = college.id
+            self._rows[college.id] = row
+        self.alive[:len(colleges)] = True
+        self.size = len(colleges)
+
+    def _grow(self):
+        capacity = max(2 * len(self.alive), 1024)
+        matrix = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        college_ids = np.zeros(capacity, dtype=np.int64)
+        college_ids[:self.size] = self.college_ids[:self.size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        self.matrix, self.college_ids, self.alive = matrix, college_ids, alive
+
+    def apply_saved(self, college):
+        row = self._rows.get(college.id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self.size == len(self.alive):
+                    self._grow()
+                row = self.size
+                self.size += 1
+        self.matrix[row] = self._vector(
+            college.stream,
+            [(course.category, course.course_name) for course in college.courses],
+            college.median_total_fee,
+            _about_terms(college.about),
+        )
+        self.college_ids[row] = college.id
+        self.alive[row] = True
+        self._rows[college.id] = row
+
+    def apply_deleted(self, college_id: int):
+        row = self._rows.pop(college_id, None)
+        if row is not None:
+            self.alive[row] = False
+            self.matrix[row] = 0
+            self._free.append(row)
+
+    # -- querying --------------------------------------------------------
+
+    def similar(self, db: Session, college_id: int, limit: int):
+        """[(college_id, score)] most similar first, or None if the college is unknown"""
+        self.ensure_current(db)
+        with self.lock:
+            row = self._rows.get(college_id)
+            if row is None:
+                return None
+            scores = self.matrix[:self.size] @ self.matrix[row]
+            scores[~self.alive[:self.size]] = -np.inf
+            scores[row] = -np.inf
+
+            limit = min(limit, len(self._rows) - 1)
+            if limit <= 0:
+                return []
+            top = np.argpartition(scores, -limit)[-limit:]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(self.college_ids[i]), round(float(scores[i]), 4)) for i in top]
+
+
+similarity_index = SimilarityIndex()
+
+
+@router.get("/{college_id}/similar")
+def get_similar_colleges(
+    college_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Colleges most similar to the given one by stream, course mix, fee profile and description.
+    """
+    hits = similarity_index.similar(db, college_id, limit)
+    if hits is None:
+        raise HTTPException(status_code=404, detail="College not found")
+
+    colleges = {
+        college.id: college
+        for college in db.query(
+            models.College.id, models.College.college_name, models.College.address,
+            models.College.stream, models.College.image_hash,
+        ).filter(models.College.id.in_([hit_id for hit_id, _ in hits]))
+    }
+    results = [
+        {
+            "id": hit_id,
+            "college_name": colleges[hit_id].college_name,
+            "address": colleges[hit_id].address,
+            "stream": colleges[hit_id].stream,
+            "img_url": image_url(colleges[hit_id]),
+            "score": score,
+        }
+        for hit_id, score in hits
+        if hit_id in colleges
+    ]
+    return ORJSONResponse({"college_id": college_id, "results": results})
@@ -0,0 +1,199 @@
+"""
+Pre-serialized snapshot of the college listing.
+
+The unfiltered listing and the per-stream and per-category listings are kept
+as ready-to-send JSON bytes, plus gzip and brotli copies, so serving them
+costs no ORM, Pydantic or JSON work. Each college is serialized once into a
+fragment; after add_college/delete_college only that fragment changes and
+the views containing the college are re-joined and recompressed on their
+next read, so a burst of writes costs one rebuild per view. Views follow
+the database's ORDER BY college_name, id, like the paginated listing.
+
+Kept current with the other derived indexes, see cache.DerivedIndex.
+"""
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+import brotli
+from fastapi import Request, Response
+from sqlalchemy.orm import Session, selectinload
+
+from . import models, schemas
+from .cache import DerivedIndex
+from .images import etag_matches
+
+ALL = ("all",)
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    college_id: int
+    college_name: str
+    stream: Optional[str]
+    categories: frozenset
+    fragment: bytes  # JSON object of one CollegeOut
+
+
+@dataclass(frozen=True)
+class SnapshotView:
+    body: bytes
+    gzip: bytes
+    br: bytes
+    etag: str
+
+
+def view_key(stream=None, category=None, min_fee=None, max_fee=None, q=None, sort="name", limit=None, cursor=None):
+    """Snapshot view for a listing request, or None if the request needs a query"""
+    if min_fee is not None or max_fee is not None or q or sort != "name" or limit is not None or cursor:
+        return None
+    if stream and category:
+        return None
+    if stream:
+        return ("stream", stream)
+    if category:
+        return ("category", category)
+    return ALL
+
+
+def _entry_views(entry: SnapshotEntry):
+    yield ALL
+    if entry.stream:
+        yield ("stream", entry.stream)
+    for category in entry.categories:
+        yield ("category", category)
+
+
+def _make_entry(college) -> SnapshotEntry:
+    return SnapshotEntry(
+        college_id=college.id,
+        college_name=college.college_name,
+        stream=college.stream,
+        categories=frozenset(c.category for c in college.courses if c.category),
+        fragment=schemas.college_json(college),
+    )
+
+
+def _make_view(ordered) -> SnapshotView:
+    body = b"[" + b",".join(e.fragment for e in ordered) + b"]"
+    return SnapshotView(
+        body=body,
+        gzip=gzip.compress(body, compresslevel=6),
+        br=brotli.compress(body, quality=5),
+        etag=f'"{hashlib.sha256(body).hexdigest()}"',
+    )
+
+
+def listing_order(db: Session) -> list:
+    """College ids in the order of the paginated listing (sort=name), collation included"""
+    return [
+        college_id
+        for college_id, in db.query(models.College.id).order_by(models.College.college_name, models.College.id)
+    ]
+
+
+class ListingSnapshot(DerivedIndex):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries = {}  # college id -> SnapshotEntry
+        self._members = {}  # view key -> ids of the colleges in it
+        self._order = None  # all college ids in listing order, None until re-read after a write
+        self._views = {}    # view key -> SnapshotView, built on first read after a change
+
+    def view(self, db: Session, key) -> Optional[SnapshotView]:
+        """Current view for key, or None if no college is in it"""
+        self.ensure_current(db)
+        with self.lock:
+            view = self._views.get(key)
+            members = self._members.get(key)
+            if view is not None or not members:
+                return view
+            if self._order is None:
+                self._order = listing_order(db)
+            ordered = [self._entries[i] for i in self._order if i in members]
+            view = _make_view(ordered)
+            if len(ordered) == len(members):
+                self._views[key] = view
+            else:
+                # A college committed after the order was read, read it again next time
+                self._order = None
+            return view
+
+    def rebuild(self, db: Session):
+        # Views served so far are built here rather than on their next read,
+        # which matters for background rebuilds (see cache.DerivedIndex)
+        served = list(self._views)
+        colleges = (
+            db.query(models.College)
+            .options(selectinload(models.College.courses))
+            .order_by(models.College.college_name, models.College.id)
+            .all()
+        )
+        self._entries = {college.id: _make_entry(college) for college in colleges}
+        self._members = {}
+        for entry in self._entries.values():
+            for key in _entry_views(entry):
+                self._members.setdefault(key, set()).add(entry.college_id)
+        self._order = list(self._entries)
+        self._views = {
+            key: _make_view([self._entries[i] for i in self._order if i in self._members[key]])
+            for key in served
+            if self._members.get(key)
+        }
+
+    def _replace(self, college_id: int, entry: Optional[SnapshotEntry]):
+        """Swap one college's fragment and mark the views containing it stale"""
+        old = self._entries.pop(college_id, None)
+        if old:
+            for key in _entry_views(old):
+                self._members[key].discard(college_id)
+                self._views.pop(key, None)
+        if entry:
+            self._entries[college_id] = entry
+            for key in _entry_views(entry):
+                self._members.setdefault(key, set()).add(college_id)
+                self._views.pop(key, None)
+            if old is None or old.college_name != entry.college_name:
+                # Its position in the listing order is not known here
+                self._order = None
+
+    def apply_saved(self, college):
+        self._replace(college.id, _make_entry(college))
+
+    def apply_deleted(self, college_id: int):
+        self._replace(college_id, None)
+
+
+listing_snapshot = ListingSnapshot()
+
+
+def preferred_encoding(accept_encoding: str, supported=("br", "gzip")) -> Optional[str]:
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    for encoding in supported:
+        if offered.get(encoding, 0) > 0:
+            return encoding
+    return None
+
+
+def snapshot_response(view: SnapshotView, request: Request) -> Response:
+    encoding = preferred_encoding(request.headers.get("accept-encoding", ""))
+    # One ETag per encoding: the bytes differ, so a cached br body must not validate a gzip request
+    etag = f'{view.etag[:-1]}-{encoding}"' if encoding else view.etag
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    body = {"br": view.br, "gzip": view.gzip}.get(encoding, view.body)
+    return Response(content=body, media_type="application/json", headers=headers)
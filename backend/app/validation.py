@@ -0,0 +1,71 @@
+"""
+Validation rules for new colleges and courses, shared by add_college and
+the bulk importer. Errors are ValueErrors with a message fit for the client.
+"""
+from . import models
+from .listing import year_fees
+
+# Number of semester fees each course category must have
+CATEGORY_SEMESTERS = {"PG": 4, "UG": 6, "Engineering": 8}
+
+COLLEGE_FIELDS = ("college_name", "address", "about", "price_range", "stream")
+SEM_FEE_FIELDS = tuple(f"sem{i}_fee" for i in range(1, 9))
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def college_columns(college: dict) -> dict:
+    """College column values from an input record"""
+    values = {field: college.get(field) or None for field in COLLEGE_FIELDS}
+    if not values["college_name"]:
+        raise ValidationError("'college_name' is required.")
+    for field, value in values.items():
+        if value is not None and not isinstance(value, str):
+            raise ValidationError(f"'{field}' must be a string.")
+        limit = getattr(models.College.__table__.c[field].type, "length", None)
+        if value and limit and len(value) > limit:
+            raise ValidationError(f"'{field}' is longer than {limit} characters.")
+    return values
+
+
+def course_columns(idx: int, course: dict) -> dict:
+    """
+    Course column values (without college_id) from the idx-th (0-based)
+    course of a college, including the derived total and year fees.
+    """
+    if not isinstance(course, dict):
+        raise ValidationError(f"Course {idx + 1}: Each course must be an object.")
+    course_name = course.get("course_name")
+    course_category = course.get("category")
+
+    if not course_name or not course_category:
+        raise ValidationError(f"Course {idx + 1}: Each course must have 'course_name' and 'category'.")
+
+    if course_category not in CATEGORY_SEMESTERS:
+        raise ValidationError(
+            f"Course {idx + 1} ('{course_name}'): Invalid category '{course_category}'. Must be 'UG', 'PG', or 'Engineering'."
+        )
+
+    sem_fees = [course.get(field) for field in SEM_FEE_FIELDS]
+    filled_fees = [f for f in sem_fees if f is not None]
+    # type() rather than isinstance(): JSON true/false are not fees
+    if any(type(fee) not in (int, float) for fee in filled_fees):
+        field = next(f for f, fee in zip(SEM_FEE_FIELDS, sem_fees) if fee is not None and type(fee) not in (int, float))
+        raise ValidationError(f"Course {idx + 1} ('{course_name}'): '{field}' must be a number.")
+
+    expected_semesters = CATEGORY_SEMESTERS[course_category]
+    if len(filled_fees) != expected_semesters:
+        raise ValidationError(
+            f"Course {idx + 1} ('{course_name}'): Must have exactly {expected_semesters} semester fees, got {len(filled_fees)}."
+        )
+
+    return {
+        "course_name": course_name,
+        "course_about": course.get("course_about"),
+        "category": course_category,
+        **dict(zip(SEM_FEE_FIELDS, sem_fees)),
+        "total_fee": sum(filled_fees),
+        **{f"year{y}_fee": fee for y, fee in enumerate(year_fees(sem_fees), 1)},
+    }
@@ -0,0 +1,64 @@
+"""
+Latency and size of the autocomplete prefix index at 100k courses:
+build time, approximate memory, p50/p95 per lookup and the cost of
+applying one add_college incrementally.
+
+Usage:
+    python -m benchmarks.autocomplete
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks.search import seed_text, COLLEGES, COURSES_PER_COLLEGE
+from app import database
+from app.autocomplete import prefix_index
+
+
+def main():
+    rng = random.Random(11)
+    vocabulary = seed_text(rng)
+    db = database.SessionLocal()
+
+    start = time.perf_counter()
+    prefix_index.ensure_current(db)
+    elapsed = time.perf_counter() - start
+
+    # Measure memory on a second build, tracemalloc slows the build down
+    tracemalloc.start()
+    with prefix_index.lock:
+        prefix_index.rebuild(db)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"index build: {elapsed * 1000:.0f} ms for {COLLEGES * COURSES_PER_COLLEGE} courses, ~{size / 2**20:.1f} MB")
+
+    queries = {
+        "1 char": [rng.choice(vocabulary)[:1] for _ in range(1000)],
+        "3 chars": [rng.choice(vocabulary)[:3] for _ in range(1000)],
+        "word": [rng.choice(vocabulary) for _ in range(1000)],
+        "no match": ["zzzzzz" for _ in range(1000)],
+    }
+    for label, batch in queries.items():
+        samples = []
+        for query in batch:
+            start = time.perf_counter()
+            prefix_index.suggest(db, query, 10)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        print(f"{label:<9} p50={statistics.median(samples) * 1e6:6.1f} us  p95={samples[int(len(samples) * 0.95)] * 1e6:6.1f} us")
+
+    college = SimpleNamespace(
+        id=COLLEGES + 1, college_name="Benchmark Institute Of Technology",
+        courses=[SimpleNamespace(course_name=f"Benchmark Course {n}") for n in range(COURSES_PER_COLLEGE)],
+    )
+    start = time.perf_counter()
+    with prefix_index.lock:
+        prefix_index.apply_saved(college)
+    print(f"incremental add: {(time.perf_counter() - start) * 1000:.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Bulk import throughput: 20k colleges with 10 courses each from an NDJSON
+file and the same data as CSV, through importer.import_file, and the
+process peak RSS afterwards (flat in the input size: input is streamed).
+
+Usage:
+    python -m benchmarks.bulk_import
+"""
+import csv
+import random
+import tempfile
+import resource
+import time
+
+import orjson
+
+from benchmarks.common import CATEGORY_SEMESTERS, STREAMS, reset_database
+from app import database
+from app.importer import CSV_COURSE_FIELDS, import_file
+from app.validation import COLLEGE_FIELDS
+
+COLLEGES = 20_000
+COURSES_PER_COLLEGE = 10
+
+
+def make_record(rng, n):
+    courses = []
+    for i in range(COURSES_PER_COLLEGE):
+        category = rng.choice(list(CATEGORY_SEMESTERS))
+        courses.append({
+            "course_name": f"Course {i}",
+            "course_about": "About this course " * 5,
+            "category": category,
+            **{f"sem{s}_fee": float(rng.randrange(20000, 150000, 500)) for s in range(1, CATEGORY_SEMESTERS[category] + 1)},
+        })
+    return {
+        "college_name": f"College {n:06d}",
+        "address": f"{n} Campus Road",
+        "about": "A college about page. " * 20,
+        "price_range": "100000-500000",
+        "stream": rng.choice(STREAMS),
+        "courses": courses,
+    }
+
+
+def run(path, fmt):
+    reset_database()
+    db = database.SessionLocal()
+    start = time.perf_counter()
+    with open(path, "rb") as source:
+        report = import_file(db, source, fmt)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    db.close()
+    assert report["error_count"] == 0, report["errors"][:5]
+    print(
+        f"{fmt:6}: {report['colleges']} colleges, {report['courses']} courses in {elapsed:.1f}s "
+        f"({report['courses'] / elapsed:,.0f} courses/s), peak RSS {peak / 2**20:.1f} MB"
+    )
+
+
+def main():
+    rng = random.Random(11)
+    with tempfile.NamedTemporaryFile("wb", suffix=".ndjson") as ndjson, \
+            tempfile.NamedTemporaryFile("w", suffix=".csv", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=[*COLLEGE_FIELDS, *CSV_COURSE_FIELDS])
+        writer.writeheader()
+        for n in range(1, COLLEGES + 1):
+            record = make_record(rng, n)
+            ndjson.write(orjson.dumps(record) + b"\n")
+            college = {field: record[field] for field in COLLEGE_FIELDS}
+            for course in record["courses"]:
+                writer.writerow({**college, **course})
+        ndjson.flush()
+        csv_file.flush()
+
+        run(ndjson.name, "ndjson")
+        run(csv_file.name, "csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Runs every check script (the benchmarks that exit non-zero on a
+violation) and exits non-zero if any of them failed, so one command
+gates a deploy:
+
+    python -m benchmarks.checks
+    python -m benchmarks.checks index_usage query_counts
+
+Each check runs in its own process, against its own throwaway SQLite
+database unless DATABASE_URL is set.
+"""
+import subprocess
+import sys
+import time
+
+CHECKS = [
+    "query_counts",
+    "index_usage",
+    "search_typos",
+    "search_without_trgm",
+    "image_fetch",
+    "index_refresh",
+    "export",
+]
+
+
+def main():
+    names = sys.argv[1:] or CHECKS
+    unknown = set(names) - set(CHECKS)
+    if unknown:
+        sys.exit(f"Unknown checks: {', '.join(sorted(unknown))}")
+
+    failed = []
+    for name in names:
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-m", f"benchmarks.{name}"])
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            failed.append(name)
+        print(f"-- {name:22} {'ok' if not result.returncode else 'FAILED'}  ({elapsed:.1f}s)", flush=True)
+
+    if failed:
+        print(f"{len(failed)} checks failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
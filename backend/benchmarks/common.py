@@ -0,0 +1,121 @@
+"""
+Shared setup for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database unless DATABASE_URL is
+already set, so they can be pointed at a real Postgres instance as well:
+
+    DATABASE_URL=postgresql://... python -m benchmarks.<name>
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import bindparam
+
+if not os.getenv("DATABASE_URL"):
+    _db_path = os.path.join(tempfile.mkdtemp(prefix="collegefinder-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from app import models, database  # noqa: E402
+from app.listing import year_fees  # noqa: E402
+
+CATEGORY_SEMESTERS = {"PG": 4, "UG": 6, "Engineering": 8}
+STREAMS = ["Computer Science", "Data Science", "Business", "Finance", "Marketing"]
+
+
+def reset_database():
+    models.Base.metadata.drop_all(bind=database.engine)
+    models.Base.metadata.create_all(bind=database.engine)
+
+
+def make_course(rng, college_id, idx):
+    category = rng.choice(list(CATEGORY_SEMESTERS))
+    semesters = CATEGORY_SEMESTERS[category]
+    fees = {f"sem{i}_fee": float(rng.randrange(20000, 150000, 500)) if i <= semesters else None for i in range(1, 9)}
+    years = {f"year{y}_fee": fee for y, fee in enumerate(year_fees(list(fees.values())), 1)}
+    return dict(
+        college_id=college_id,
+        course_name=f"Course {idx}",
+        course_about="About this course " * 5,
+        category=category,
+        total_fee=sum(f for f in fees.values() if f is not None),
+        **fees,
+        **years,
+    )
+
+
+def fee_aggregate_rows(course_rows):
+    """(college updates, college_fee_stats rows) matching listing.set_fee_aggregates for bulk-inserted courses"""
+    totals, by_category = {}, {}
+    for course in course_rows:
+        totals.setdefault(course["college_id"], []).append(course["total_fee"])
+        by_category.setdefault((course["college_id"], course["category"]), []).append(course["total_fee"])
+    updates = [
+        dict(college_id=college_id, min_fee=min(fees), max_fee=max(fees), median_fee=statistics.median(fees))
+        for college_id, fees in totals.items()
+    ]
+    stats = [
+        dict(college_id=college_id, category=category, course_count=len(fees), min_total_fee=min(fees),
+             max_total_fee=max(fees), median_total_fee=statistics.median(fees))
+        for (college_id, category), fees in by_category.items()
+    ]
+    return updates, stats
+
+
+def insert_courses(connection, course_rows):
+    """Bulk insert courses and the fee aggregates derived from them"""
+    for start in range(0, len(course_rows), 10000):
+        connection.execute(models.Course.__table__.insert(), course_rows[start:start + 10000])
+    updates, stats = fee_aggregate_rows(course_rows)
+    colleges = models.College.__table__
+    connection.execute(
+        colleges.update().where(colleges.c.id == bindparam("college_id")).values(
+            min_total_fee=bindparam("min_fee"), max_total_fee=bindparam("max_fee"),
+            median_total_fee=bindparam("median_fee"),
+        ),
+        updates,
+    )
+    connection.execute(models.CollegeFeeStats.__table__.insert(), stats)
+
+
+def seed(colleges, courses_per_college=5, image_bytes=0, seed_value=42):
+    """Fill the database with synthetic colleges and courses using bulk inserts."""
+    rng = random.Random(seed_value)
+    reset_database()
+    image = os.urandom(image_bytes) if image_bytes else None
+    with database.engine.begin() as connection:
+        connection.execute(models.College.__table__.insert(), [
+            dict(
+                id=i,
+                college_name=f"College {i:06d}",
+                address=f"{i} Campus Road",
+                about="A college about page. " * 20,
+                stream=rng.choice(STREAMS),
+                price_range="100000-500000",
+                college_image_data=image,
+                college_image_mime="image/jpeg" if image else None,
+                image_size=len(image) if image else None,
+                image_hash=f"{i:064x}" if image else None,
+            )
+            for i in range(1, colleges + 1)
+        ])
+        course_rows = [
+            make_course(rng, college_id, n)
+            for college_id in range(1, colleges + 1)
+            for n in range(courses_per_college)
+        ]
+        if course_rows:
+            insert_courses(connection, course_rows)
+
+
+def timed(fn, repeat=5):
+    """Run fn repeat times and return (best seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
@@ -0,0 +1,71 @@
+"""
+Deleting a college with 10k likes and 10k compare entries: the old ORM
+delete (children loaded and deleted row by row, as before passive_deletes)
+against the single DELETE that lets ON DELETE CASCADE remove the children,
+and the bulk delete of several such colleges in one statement.
+
+Usage:
+    python -m benchmarks.delete_college
+"""
+import time
+
+from sqlalchemy import delete
+from sqlalchemy.orm import selectinload
+
+from benchmarks.common import seed
+from app import database, models
+
+COLLEGES = 1_000
+LIKES = 10_000
+POPULAR = range(1, 7)  # colleges given LIKES likes and compare entries each
+
+
+def seed_popular():
+    seed(COLLEGES, courses_per_college=5)
+    with database.engine.begin() as connection:
+        connection.execute(models.User.__table__.insert(), [
+            dict(id=i, username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+            for i in range(1, LIKES + 1)
+        ])
+        for table in (models.LikedCollege.__table__, models.CompareCollege.__table__):
+            connection.execute(table.insert(), [
+                dict(user_id=user_id, college_id=college_id) for college_id in POPULAR for user_id in range(1, LIKES + 1)
+            ])
+
+
+def orm_delete(db, college_id):
+    college = (
+        db.query(models.College)
+        .options(*[selectinload(getattr(models.College, name))
+                   for name in ("courses", "liked_by_users", "compared_by_users", "fee_stats")])
+        .filter(models.College.id == college_id)
+        .one()
+    )
+    db.delete(college)
+    db.commit()
+
+
+def single_delete(db, college_ids):
+    db.execute(delete(models.College).where(models.College.id.in_(college_ids)))
+    db.commit()
+
+
+def main():
+    seed_popular()
+    db = database.SessionLocal()
+    for label, run in (
+        ("ORM delete, children loaded", lambda: orm_delete(db, 1)),
+        ("single DELETE + cascade", lambda: single_delete(db, [2])),
+        ("bulk DELETE of 4 colleges", lambda: single_delete(db, [3, 4, 5, 6])),
+    ):
+        start = time.perf_counter()
+        run()
+        print(f"{label:28}: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    assert db.query(models.LikedCollege).count() == 0
+    assert db.query(models.CompareCollege).count() == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+p50/p99 latency under mixed load: concurrent liked-colleges requests (DB bound)
+interleaved with requests to an async endpoint that does no DB work.
+
+"before" mounts the liked-colleges handler the old way, an async def calling
+the sync Session directly on the event loop. "after" uses the real endpoint,
+which FastAPI runs in the bounded worker thread pool. Every SQL statement is
+given DB_LATENCY of extra round-trip time to mimic a remote Postgres.
+
+Usage:
+    python -m benchmarks.event_loop_latency
+"""
+import asyncio
+import statistics
+import time
+
+import anyio
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+
+from benchmarks.common import seed
+from app import models, database, crud
+from app.auth import get_db
+from app.main import app
+
+DB_LATENCY = 0.005
+CONCURRENCY = 30
+REQUESTS_PER_WORKER = 20
+
+
+@app.get("/bench/liked-blocking/{user_id}")
+async def liked_blocking(user_id: int, db=Depends(get_db)):
+    return crud.get_liked_colleges(user_id, db)
+
+
+@app.get("/bench/ping")
+async def ping():
+    return {"ok": True}
+
+
+def add_db_latency(conn, cursor, statement, parameters, context, executemany):
+    time.sleep(DB_LATENCY)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(liked_path):
+    latencies = {"liked": [], "ping": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker(n):
+            for _ in range(REQUESTS_PER_WORKER):
+                kind, path = ("liked", liked_path) if n % 2 else ("ping", "/bench/ping")
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies[kind].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def report(label, latencies, elapsed):
+    for kind, samples in latencies.items():
+        print(
+            f"{label:<7} {kind:<6} p50={statistics.median(samples) * 1000:7.1f} ms"
+            f"  p99={percentile(samples, 99) * 1000:7.1f} ms"
+        )
+    total = sum(len(s) for s in latencies.values())
+    print(f"{label:<7} throughput={total / elapsed:7.1f} req/s")
+
+
+async def main():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = database.WORKER_THREADS
+    for label, path in [("before", "/bench/liked-blocking/1"), ("after", "/college/liked/1")]:
+        latencies, elapsed = await run(path)
+        report(label, latencies, elapsed)
+
+
+if __name__ == "__main__":
+    seed(50, courses_per_college=5)
+    with database.engine.begin() as connection:
+        connection.execute(models.User.__table__.insert(), [dict(id=1, username="bench", email="bench@example.com", password_hash="x")])
+        connection.execute(models.LikedCollege.__table__.insert(), [dict(user_id=1, college_id=i) for i in range(1, 11)])
+    event.listen(database.engine, "before_cursor_execute", add_db_latency)
+    asyncio.run(main())
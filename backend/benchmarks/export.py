@@ -0,0 +1,56 @@
+"""
+Catalog export: time, output size and peak Python memory (tracemalloc)
+of export.export_chunks at growing table sizes. Colleges are streamed in
+partitions, so the peak must stay flat as the table grows: it fails if
+the peak at any size exceeds the smallest size's peak by more than
+MAX_GROWTH_MB.
+
+Exits non-zero on a violation:
+
+    python -m benchmarks.export
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import seed
+from app.export import export_chunks
+
+SIZES = (2_000, 8_000, 24_000)
+FORMATS = (("ndjson", False), ("csv", False), ("ndjson", True))
+MAX_GROWTH_MB = 4
+
+
+def main():
+    peaks = {}  # (format, compress) -> peak per size
+    for colleges in SIZES:
+        seed(colleges, courses_per_college=5)
+        for fmt, compress in FORMATS:
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in export_chunks(fmt, compress))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            peaks.setdefault((fmt, compress), []).append(peak)
+            label = f"{fmt}{'+gzip' if compress else ''}"
+            print(
+                f"{colleges:>6} colleges {label:11}: {elapsed:.2f}s, {size / 2**20:.1f} MB out, "
+                f"peak memory {peak / 2**20:.1f} MB"
+            )
+
+    failures = 0
+    for (fmt, compress), sizes in peaks.items():
+        growth = (max(sizes) - sizes[0]) / 2**20
+        ok = growth <= MAX_GROWTH_MB
+        failures += not ok
+        label = f"{fmt}{'+gzip' if compress else ''}"
+        print(f"{label:11} peak growth over {SIZES[-1] // SIZES[0]}x the rows: {growth:+.1f} MB  {'ok' if ok else 'FAILED'}")
+
+    if failures:
+        print(f"{failures} formats grew by more than {MAX_GROWTH_MB} MB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Fee analytics over 1M courses (200k colleges): time to load the fee
+matrix, time per report (uncached) with and without filters, and the
+cost of applying one add_college and one delete_college.
+
+Usage:
+    python -m benchmarks.fee_analytics
+"""
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import seed, timed
+from app import database
+from app.analytics import fee_matrix
+
+COLLEGES = 200_000
+COURSES_PER_COLLEGE = 5
+
+
+def main():
+    start = time.perf_counter()
+    seed(COLLEGES, courses_per_college=COURSES_PER_COLLEGE)
+    print(f"seeded {COLLEGES * COURSES_PER_COLLEGE} courses in {time.perf_counter() - start:.0f} s")
+    db = database.SessionLocal()
+
+    start = time.perf_counter()
+    fee_matrix.ensure_current(db)
+    print(f"matrix load: {(time.perf_counter() - start) * 1000:.0f} ms, {fee_matrix.fees.nbytes / 2**20:.0f} MB of fees")
+
+    for label, (category, stream) in {
+        "all courses": (None, None),
+        "one category": ("Engineering", None),
+        "category + stream": ("UG", "Finance"),
+    }.items():
+        seconds, report = timed(lambda: fee_matrix._report(category, stream, 20), repeat=3)
+        print(f"{label:<18} {seconds * 1000:7.1f} ms  ({report['courses']} courses, {report['outliers']['count']} outliers)")
+
+    college = SimpleNamespace(id=COLLEGES + 1, stream="Business", courses=[
+        SimpleNamespace(id=10**7 + n, category="UG", **{f"sem{i}_fee": 50_000.0 if i <= 6 else None for i in range(1, 9)})
+        for n in range(COURSES_PER_COLLEGE)
+    ])
+    with fee_matrix.lock:
+        start = time.perf_counter()
+        fee_matrix.apply_saved(college)
+        added = time.perf_counter() - start
+        start = time.perf_counter()
+        fee_matrix.apply_deleted(college.id)
+        deleted = time.perf_counter() - start
+    print(f"incremental add: {added * 1000:.2f} ms, delete: {deleted * 1000:.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
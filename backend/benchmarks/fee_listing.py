@@ -0,0 +1,50 @@
+"""
+Budget filtering and fee sorting on the listing at 50k colleges / 250k
+courses, served by the per-college fee aggregates. Prints the time per
+page and the query plan, which should show index range scans.
+
+Usage:
+    python -m benchmarks.fee_listing
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+from benchmarks.common import seed, timed
+from app import models, database
+from app.listing import ListingFilters, list_colleges, apply_filters, _sort_columns
+
+COLLEGES = 50_000
+
+CASES = {
+    "cheapest overall": (ListingFilters(), "fee"),
+    "under 300k, by fee": (ListingFilters(max_fee=300_000), "fee"),
+    "cheapest Engineering": (ListingFilters(category="Engineering"), "fee"),
+    "Engineering 400k-600k": (ListingFilters(category="Engineering", min_fee=400_000, max_fee=600_000), "fee"),
+    "UG under 400k, by name": (ListingFilters(category="UG", max_fee=400_000), "name"),
+}
+
+
+def explain(db, filters, sort):
+    key, college_id = _sort_columns(sort, filters)
+    query = apply_filters(db.query(models.College.id), filters).order_by(key, college_id).limit(20)
+    dialect = db.get_bind().dialect
+    compiled = query.statement.compile(
+        dialect=postgresql.dialect() if dialect.name == "postgresql" else sqlite.dialect(),
+        compile_kwargs={"literal_binds": True},
+    )
+    prefix = "EXPLAIN" if dialect.name == "postgresql" else "EXPLAIN QUERY PLAN"
+    return [str(row[-1]) for row in db.connection().exec_driver_sql(f"{prefix} {compiled}")]
+
+
+def main():
+    seed(COLLEGES, courses_per_college=5)
+    db = database.SessionLocal()
+    for label, (filters, sort) in CASES.items():
+        seconds, (colleges, _) = timed(lambda: list_colleges(db, filters, sort=sort, limit=20))
+        print(f"{label:<24} {seconds * 1000:7.2f} ms  ({len(colleges)} rows)")
+        for line in explain(db, filters, sort):
+            print(f"    {line}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
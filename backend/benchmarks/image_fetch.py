@@ -0,0 +1,126 @@
+"""
+Checks images.fetch_image against a local stub server: a normal image,
+a slow server (read timeout), a server trickling bytes just under the
+read timeout (total deadline), bodies over the size cap with and without
+Content-Length, a non-image content type, non-2xx responses and an empty
+body.
+
+Exits non-zero on a violation:
+
+    python -m benchmarks.image_fetch
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anyio
+import httpx
+
+import benchmarks.common  # noqa: F401  (throwaway DATABASE_URL for the app imports)
+from app.images import ImageFetchError, fetch_image
+
+READ_TIMEOUT = 0.5
+DEADLINE = 1.5
+MAX_BYTES = 1024
+IMAGE = b"\x89PNG\r\n\x1a\n" + b"\0" * 100
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, content_type, body, length=True):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if length:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/image":
+            self.send(200, "image/png", IMAGE)
+        elif self.path == "/slow":
+            time.sleep(READ_TIMEOUT * 3)
+            self.send(200, "image/png", IMAGE)
+        elif self.path == "/trickle":
+            # A byte every 0.6 read timeouts: no single read times out
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", "40")
+            self.end_headers()
+            for _ in range(40):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(READ_TIMEOUT * 0.6)
+        elif self.path == "/large":
+            self.send(200, "image/png", b"x" * (MAX_BYTES + 1))
+        elif self.path == "/large-unannounced":
+            self.send(200, "image/png", b"x" * (MAX_BYTES + 1), length=False)
+            self.close_connection = True
+        elif self.path == "/html":
+            self.send(200, "text/html; charset=utf-8", b"<html></html>")
+        elif self.path == "/missing":
+            self.send(404, "image/png", b"")
+        elif self.path == "/error":
+            self.send(500, "text/plain", b"boom")
+        elif self.path == "/empty":
+            self.send(200, "image/png", b"")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # the client hanging up mid-response is what the timeout cases do
+
+
+# path -> expected result: the image bytes, or a substring of the ImageFetchError message
+CASES = {
+    "/image": IMAGE,
+    "/slow": "Timed out",
+    "/trickle": "Timed out",
+    "/large": "larger than",
+    "/large-unannounced": "larger than",
+    "/html": "did not return an image",
+    "/missing": "Unable to fetch",
+    "/error": "Unable to fetch",
+    "/empty": "empty image",
+}
+
+
+async def fetch(url):
+    timeout = httpx.Timeout(READ_TIMEOUT, connect=READ_TIMEOUT)
+    try:
+        data, _ = await fetch_image(url, max_bytes=MAX_BYTES, timeout=timeout, deadline=DEADLINE)
+        return data
+    except ImageFetchError as e:
+        return str(e)
+
+
+def main():
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    failures = 0
+    for path, expected in CASES.items():
+        start = time.perf_counter()
+        result = anyio.run(fetch, base + path)
+        elapsed = time.perf_counter() - start
+        ok = result == expected if isinstance(expected, bytes) else isinstance(result, str) and expected in result
+        # Nothing may outlive the deadline, whatever the server does
+        ok = ok and elapsed < DEADLINE + 0.5
+        failures += not ok
+        shown = f"{len(result)} bytes" if isinstance(result, bytes) else result
+        print(f"{path:20} {elapsed:5.2f} s  {shown:55} {'ok' if ok else 'FAILED'}")
+    server.shutdown()
+
+    if failures:
+        print(f"{failures} fetch checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Bytes fetched from the database and peak Python memory for one listing
+request, with college_image_data loaded eagerly (old behaviour) vs deferred.
+
+Usage:
+    python -m benchmarks.image_payload
+"""
+import tracemalloc
+
+from sqlalchemy.orm import undefer
+
+from benchmarks.common import seed, timed
+from app import models, database, schemas
+
+COLLEGES = 500
+IMAGE_BYTES = 200_000
+
+
+def fetched_bytes(query):
+    """Size of all column values the database sends back for the query"""
+    total = 0
+    with database.engine.connect() as connection:
+        for row in connection.execute(query.statement):
+            for value in row:
+                if isinstance(value, (bytes, str)):
+                    total += len(value)
+                elif value is not None:
+                    total += 8
+    return total
+
+
+def listing(query):
+    db = database.SessionLocal()
+    try:
+        return [schemas.college_to_out(college) for college in query.with_session(db).all()]
+    finally:
+        db.close()
+
+
+def measure(label, query):
+    tracemalloc.start()
+    seconds, _ = timed(lambda: listing(query), repeat=3)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} fetched={fetched_bytes(query) / 1e6:8.2f} MB  peak_mem={peak / 1e6:8.2f} MB  time={seconds * 1000:8.1f} ms")
+
+
+def main():
+    seed(COLLEGES, courses_per_college=5, image_bytes=IMAGE_BYTES)
+    db = database.SessionLocal()
+    base = db.query(models.College)
+    print(f"{COLLEGES} colleges with {IMAGE_BYTES // 1000} KB images")
+    measure("eager", base.options(undefer(models.College.college_image_data)))
+    measure("deferred", base)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Checks that a write made by another worker does not stall requests
+while the derived indexes catch up: the first request after the shared
+version moves must be served from the previous index while the rebuild
+runs in the background, and the new college must show up once it lands.
+
+Compares each endpoint's latency with its cold (synchronous) build time.
+Exits non-zero on a violation:
+
+    python -m benchmarks.index_refresh
+"""
+import sys
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from benchmarks.common import seed
+from app import cache, database, models
+from app.main import app
+
+COLLEGES = 20_000
+NEW_NAME = "Zyxwvut Institute"
+# A request right after the foreign write may take this share of a cold build
+# at most; a synchronous rebuild on the request path takes about all of it
+MAX_SHARE_OF_COLD_BUILD = 0.25
+REBUILD_WAIT_SECONDS = 60
+
+ENDPOINTS = [
+    "/college/search?q=college",
+    "/college/autocomplete?q=coll",
+    "/college/facets",
+    "/analytics/fees",
+    "/college/3/similar",
+    "/college/?stream=Business",
+]
+
+
+def foreign_write():
+    """Add a college and bump the shared version without notifying this worker"""
+    with database.engine.begin() as connection:
+        connection.execute(models.College.__table__.insert(), [
+            dict(id=COLLEGES + 1, college_name=NEW_NAME, address="1 New Road", stream="Business"),
+        ])
+        updated = connection.execute(text("UPDATE cache_versions SET version = version + 1 WHERE name = :name"),
+                                     {"name": cache.COLLEGES_SCOPE}).rowcount
+        if not updated:
+            connection.execute(models.CacheVersion.__table__.insert(), [dict(name=cache.COLLEGES_SCOPE, version=1)])
+
+
+def timed_get(client, path):
+    start = time.perf_counter()
+    response = client.get(path)
+    assert response.status_code == 200, (path, response.status_code)
+    return time.perf_counter() - start, response
+
+
+def main():
+    seed(COLLEGES, courses_per_college=5)
+    failures = 0
+    with TestClient(app) as client:
+        cold = {path: timed_get(client, path)[0] for path in ENDPOINTS}
+
+        foreign_write()
+        time.sleep(cache.VERSION_CHECK_SECONDS + 0.1)
+        for path in ENDPOINTS:
+            elapsed, _ = timed_get(client, path)
+            ok = elapsed < cold[path] * MAX_SHARE_OF_COLD_BUILD
+            failures += not ok
+            print(f"{path:32} cold build {cold[path] * 1000:7.0f} ms   after foreign write {elapsed * 1000:6.1f} ms  "
+                  f"{'ok' if ok else 'FAILED'}")
+
+        deadline = time.monotonic() + REBUILD_WAIT_SECONDS
+        found = False
+        while not found and time.monotonic() < deadline:
+            time.sleep(0.5)
+            _, response = timed_get(client, "/college/autocomplete?q=zyxwvut")
+            found = bool(response.json()["suggestions"])
+        failures += not found
+        print(f"background rebuild picked up the new college: {'ok' if found else 'FAILED'}")
+
+    if failures:
+        print(f"{failures} checks failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Checks that the hot endpoints' queries use indexes: seeds a dataset and
+calls each endpoint under query_count.assert_indexed, which EXPLAINs every
+statement it ran and fails if the plan reads a listed table without an
+index. The foreign key lookups behind ON DELETE CASCADE are checked the
+same way.
+
+Exits non-zero on a violation, so it can gate a deploy:
+
+    python -m benchmarks.index_usage
+    DATABASE_URL=postgresql://... python -m benchmarks.index_usage
+"""
+import random
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from benchmarks.common import seed
+from app import database, models
+from app.main import app
+from app.query_count import assert_indexed, full_scans
+
+COLLEGES = 20_000
+USERS = 2_000
+LIKES_PER_USER = 20
+
+# (method, path, tables that must be read through an index)
+ENDPOINTS = [
+    ("GET", "/college/5", ["courses_1"]),
+    ("GET", "/college/batch?ids=3,1,2", ["colleges_1", "courses_1"]),
+    ("GET", "/college/?stream=Business&q=College%2000&limit=20", ["colleges_1", "courses_1"]),
+    ("GET", "/college/?category=PG&max_fee=200000&limit=20&sort=fee", ["college_fee_stats", "courses_1"]),
+    ("GET", "/college/popular?limit=10", ["colleges_1"]),
+    ("GET", "/college/liked/7", ["liked_colleges", "courses_1"]),
+    ("GET", "/college/liked/7/status?ids=1,2,3,4,5", ["liked_colleges"]),
+    ("POST", "/college/like/11", ["liked_colleges"]),
+    ("GET", "/college/compare/7", ["compare_colleges", "courses_1"]),
+    ("GET", "/college/compare/7/matrix", ["compare_colleges", "courses_1"]),
+    ("DELETE", "/college/13", ["colleges_1"]),
+]
+
+# Child rows looked up when a parent row is deleted (ON DELETE CASCADE)
+CASCADE_LOOKUPS = [
+    ("courses_1", "college_id"),
+    ("college_fee_stats", "college_id"),
+    ("liked_colleges", "college_id"),
+    ("liked_colleges", "user_id"),
+    ("compare_colleges", "college_id"),
+    ("compare_colleges", "user_id"),
+]
+
+
+def seed_users(rng):
+    with database.engine.begin() as connection:
+        connection.execute(models.User.__table__.insert(), [
+            dict(id=i, username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+            for i in range(1, USERS + 1)
+        ])
+        for table in (models.LikedCollege.__table__, models.CompareCollege.__table__):
+            connection.execute(table.insert(), [
+                dict(user_id=user_id, college_id=college_id)
+                for user_id in range(1, USERS + 1)
+                for college_id in rng.sample(range(1, COLLEGES + 1), LIKES_PER_USER if table.name == "liked_colleges" else 3)
+            ])
+        connection.execute(text("ANALYZE"))
+
+
+def main():
+    rng = random.Random(9)
+    seed(COLLEGES, courses_per_college=5)
+    seed_users(rng)
+
+    failures = 0
+    with TestClient(app) as client:
+        for method, path, tables in ENDPOINTS:
+            try:
+                with assert_indexed(tables) as counter:
+                    response = client.request(method, path, data={"user_id": 7} if method == "POST" else None)
+                status = "ok"
+            except AssertionError as error:
+                failures += 1
+                status = str(error)
+            assert response.status_code == 200, (method, path, response.status_code)
+            print(f"{method:6} {path:55} {response.status_code}  {counter.count} queries  {status}")
+
+    with database.engine.connect() as connection:
+        placeholder = "%(value)s" if connection.dialect.name == "postgresql" else "?"
+        for table, column in CASCADE_LOOKUPS:
+            statement = f"SELECT 1 FROM {table} WHERE {column} = {placeholder}"
+            parameters = {"value": 1} if connection.dialect.name == "postgresql" else (1,)
+            scanned = full_scans(connection, statement, parameters)
+            failures += bool(scanned)
+            print(f"cascade lookup {f'{table}.{column}':40} {'ok' if not scanned else 'FULL SCAN'}")
+
+    if failures:
+        print(f"{failures} checks read a table without an index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
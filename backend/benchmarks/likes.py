@@ -0,0 +1,59 @@
+"""
+Like toggles and like counts: p50/p95 per toggle (one statement plus the
+event append, committed), time to flush a backlog of 10k like events
+into College.like_count, and the most-liked query afterwards.
+
+Usage:
+    python -m benchmarks.likes
+"""
+import random
+import statistics
+import time
+
+from benchmarks.common import seed, timed
+from app import database, models
+from app.likes import flush_like_counts, toggle_like
+
+COLLEGES = 10_000
+USERS = 2_000
+TOGGLES = 10_000
+
+
+def main():
+    rng = random.Random(5)
+    seed(COLLEGES, courses_per_college=0)
+    with database.engine.begin() as connection:
+        connection.execute(models.User.__table__.insert(), [
+            dict(id=i, username=f"user{i}", email=f"user{i}@example.com", password_hash="x")
+            for i in range(1, USERS + 1)
+        ])
+
+    db = database.SessionLocal()
+    samples = []
+    for _ in range(TOGGLES):
+        # Skewed towards a few popular colleges, like real traffic
+        college_id = min(int(rng.paretovariate(1.2)), COLLEGES)
+        start = time.perf_counter()
+        toggle_like(db, rng.randint(1, USERS), college_id)
+        db.commit()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"toggle: p50={statistics.median(samples) * 1000:.2f} ms  p95={samples[int(len(samples) * 0.95)] * 1000:.2f} ms")
+
+    pending = db.query(models.LikeEvent).count()
+    start = time.perf_counter()
+    updated = flush_like_counts()
+    print(f"flush: {pending} events -> {updated} colleges in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    best, top = timed(lambda: (
+        db.query(models.College.id, models.College.like_count)
+        .filter(models.College.like_count > 0)
+        .order_by(models.College.like_count.desc(), models.College.id)
+        .limit(20).all()
+    ))
+    print(f"most liked (top 20): {best * 1000:.2f} ms, top college has {top[0].like_count} likes")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Checks that the college read endpoints run a fixed number of queries,
+however many colleges and courses they return (no N+1 loading of
+courses). Each endpoint is called once under
+query_count.assert_max_queries, so nothing is served from a warm cache.
+
+Exits non-zero on a violation:
+
+    python -m benchmarks.query_counts
+"""
+import sys
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import seed
+from app import database, models
+from app.main import app
+from app.query_count import assert_max_queries
+
+COLLEGES = 2_000
+SHARED_NAME = "Shared Name College"  # given to several colleges for /college/name/
+USER_ID = 1
+
+# (path, most queries allowed); every path returns many colleges or courses
+ENDPOINTS = [
+    ("/college/?limit=50", 3),
+    ("/college/?stream=Business&sort=fee&limit=50", 2),
+    ("/college/5", 2),
+    (f"/college/name/{SHARED_NAME}", 2),
+    (f"/college/compare/{USER_ID}", 2),
+    (f"/college/compare/{USER_ID}/matrix", 1),
+    (f"/college/liked/{USER_ID}", 3),
+]
+
+
+def seed_user():
+    with database.engine.begin() as connection:
+        connection.execute(
+            models.College.__table__.update()
+            .where(models.College.id.in_(range(100, 120)))
+            .values(college_name=SHARED_NAME)
+        )
+        connection.execute(models.User.__table__.insert(), [
+            dict(id=USER_ID, username="user1", email="user1@example.com", password_hash="x"),
+        ])
+        for table in (models.LikedCollege.__table__, models.CompareCollege.__table__):
+            connection.execute(table.insert(), [
+                dict(user_id=USER_ID, college_id=college_id) for college_id in range(200, 220)
+            ])
+
+
+def main():
+    seed(COLLEGES, courses_per_college=8)
+    seed_user()
+
+    failures = 0
+    with TestClient(app) as client:
+        for path, limit in ENDPOINTS:
+            try:
+                with assert_max_queries(limit) as counter:
+                    response = client.get(path)
+                status = "ok"
+            except AssertionError as error:
+                failures += 1
+                status = str(error)
+            assert response.status_code == 200, (path, response.status_code)
+            print(f"{path:48} {counter.count} queries (max {limit})  {status}")
+
+    if failures:
+        print(f"{failures} endpoints ran more queries than allowed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
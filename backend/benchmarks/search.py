@@ -0,0 +1,77 @@
+"""
+Latency of the in-process search index (used when not on Postgres) at
+100k courses: build time and p50/p95 per query, including typo queries.
+
+Usage:
+    python -m benchmarks.search
+"""
+import random
+import statistics
+import string
+import time
+
+from benchmarks.common import insert_courses, make_course, reset_database, STREAMS
+from app import models, database
+from app.search import search_index
+
+COLLEGES = 10_000
+COURSES_PER_COLLEGE = 10
+VOCABULARY = 5_000
+
+
+def words(rng, vocabulary, n):
+    return " ".join(rng.choice(vocabulary) for _ in range(n))
+
+
+def seed_text(rng, colleges=COLLEGES):
+    vocabulary = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 11))) for _ in range(VOCABULARY)]
+    reset_database()
+    with database.engine.begin() as connection:
+        connection.execute(models.College.__table__.insert(), [
+            dict(id=i, college_name=f"{words(rng, vocabulary, 2).title()} College", address=words(rng, vocabulary, 3),
+                 about=words(rng, vocabulary, 40), stream=rng.choice(STREAMS))
+            for i in range(1, colleges + 1)
+        ])
+        courses = []
+        for college_id in range(1, colleges + 1):
+            for n in range(COURSES_PER_COLLEGE):
+                course = make_course(rng, college_id, n)
+                course.update(course_name=words(rng, vocabulary, 2), course_about=words(rng, vocabulary, 15))
+                courses.append(course)
+        insert_courses(connection, courses)
+    return vocabulary
+
+
+def typo(rng, word):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def main():
+    rng = random.Random(7)
+    vocabulary = seed_text(rng)
+    db = database.SessionLocal()
+
+    start = time.perf_counter()
+    search_index.ensure_current(db)
+    print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms for {COLLEGES * COURSES_PER_COLLEGE} courses")
+
+    queries = {
+        "one word": [rng.choice(vocabulary) for _ in range(300)],
+        "two words": [words(rng, vocabulary, 2) for _ in range(300)],
+        "typo": [typo(rng, rng.choice(vocabulary)) for _ in range(300)],
+        "prefix": [rng.choice(vocabulary)[:3] for _ in range(300)],
+    }
+    for label, batch in queries.items():
+        samples = []
+        for query in batch:
+            start = time.perf_counter()
+            search_index.search(db, query, 20)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        print(f"{label:<10} p50={statistics.median(samples) * 1000:6.2f} ms  p95={samples[int(len(samples) * 0.95)] * 1000:6.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
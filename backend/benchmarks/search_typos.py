@@ -0,0 +1,52 @@
+"""
+Checks that /college/search tolerates the usual typos in a word: a
+swapped pair of letters, a missing, an extra and a wrong letter. Uses the
+in-process index unless DATABASE_URL points at Postgres.
+
+Exits non-zero on a miss:
+
+    python -m benchmarks.search_typos
+"""
+import sys
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import reset_database
+from app import database, models
+from app.main import app
+
+NAMES = ["Alpha Institute", "Bravo Engineering College", "Charlie Business School", "Delta Arts College"]
+
+# query -> college name it must find
+QUERIES = {
+    "alpah": "Alpha Institute",                    # swapped letters
+    "instiute": "Alpha Institute",                 # missing letter
+    "engineerring": "Bravo Engineering College",   # extra letter
+    "buziness": "Charlie Business School",         # wrong letter
+    "detla": "Delta Arts College",                 # swapped letters
+}
+
+
+def main():
+    reset_database()
+    with database.engine.begin() as connection:
+        connection.execute(models.College.__table__.insert(), [
+            dict(id=i, college_name=name, stream="General") for i, name in enumerate(NAMES, 1)
+        ])
+
+    failures = 0
+    with TestClient(app) as client:
+        for query, expected in QUERIES.items():
+            response = client.get("/college/search", params={"q": query})
+            names = [r["college_name"] for r in response.json()["results"]] if response.status_code == 200 else []
+            ok = bool(names) and names[0] == expected
+            failures += not ok
+            print(f"{query:14} -> {names[0] if names else response.status_code!s:28} {'ok' if ok else 'FAILED'}")
+
+    if failures:
+        print(f"{failures} typo queries missed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
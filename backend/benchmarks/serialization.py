@@ -0,0 +1,74 @@
+"""
+Serialization cost of a listing response: the previous path (CollegeOut /
+CourseOut models, response_model validation, jsonable encoding, json.dumps)
+vs schemas.colleges_json (dicts straight to orjson), for ORM objects and for
+plain result rows.
+
+Usage:
+    python -m benchmarks.serialization
+"""
+import json
+import random
+from collections import namedtuple
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from benchmarks.common import make_course, timed
+from app import models, schemas
+
+COURSES_PER_COLLEGE = 10
+SIZES = [10, 1_000, 50_000]  # total courses
+
+response_adapter = TypeAdapter(List[schemas.CollegeOut])
+
+CollegeRow = namedtuple("CollegeRow", "id college_name address about stream price_range image_hash")
+CourseRow = namedtuple("CourseRow", schemas.COURSE_OUT_FIELDS)
+
+
+def build(total_courses):
+    rng = random.Random(1)
+    colleges = []
+    for college_id in range(1, max(1, total_courses // COURSES_PER_COLLEGE) + 1):
+        college = models.College(
+            id=college_id, college_name=f"College {college_id}", address="Campus Road",
+            about="About the college. " * 20, stream="Business", price_range="1-5 L", image_hash="ab" * 32,
+        )
+        college.courses = [models.Course(**make_course(rng, college_id, n)) for n in range(COURSES_PER_COLLEGE)]
+        colleges.append(college)
+    return colleges
+
+
+def pydantic_path(colleges):
+    # What FastAPI 0.101 does for response_model=list[CollegeOut] after the handler returns
+    content = [schemas.college_to_out(c) for c in colleges]
+    validated = response_adapter.validate_python(content, from_attributes=True)
+    return json.dumps(response_adapter.dump_python(validated, mode="json")).encode()
+
+
+def rows_json(rows):
+    return orjson.dumps([schemas.college_dict(college, courses) for college, courses in rows])
+
+
+def main():
+    for total in SIZES:
+        colleges = build(total)
+        rows = [
+            (CollegeRow(c.id, c.college_name, c.address, c.about, c.stream, c.price_range, c.image_hash),
+             [CourseRow(*(getattr(course, f) for f in schemas.COURSE_OUT_FIELDS)) for course in c.courses])
+            for c in colleges
+        ]
+        repeat = 20 if total < 10_000 else 3
+        old, old_body = timed(lambda: pydantic_path(colleges), repeat)
+        lean, lean_body = timed(lambda: schemas.colleges_json(colleges), repeat)
+        raw, _ = timed(lambda: rows_json(rows), repeat)
+        assert json.loads(old_body) == json.loads(lean_body)
+        print(
+            f"{total:>6} courses  pydantic={old * 1000:9.2f} ms  lean(orm)={lean * 1000:8.2f} ms"
+            f"  lean(rows)={raw * 1000:8.2f} ms  speedup={old / lean:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
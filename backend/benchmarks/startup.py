@@ -0,0 +1,68 @@
+"""
+Per-worker startup cost of schema handling: the old startup (create_all
+plus the schema upgrade statements on Postgres, every start), the versioned
+runner at head (app.migrate, once per deploy or with MIGRATE_ON_STARTUP)
+and the default startup, which does no schema work. Each start begins
+with no pooled connections, like a fresh worker.
+
+Usage:
+    python -m benchmarks.startup
+"""
+import importlib.util
+import os
+import statistics
+import time
+
+from sqlalchemy import text
+
+from benchmarks.common import seed
+from app import database, models
+from app.migrate import run_migrations
+
+RUNS = 10
+
+
+def baseline_migration():
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations", "versions", "0001_baseline.py")
+    spec = importlib.util.spec_from_file_location("baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def old_startup(upgrade_statements):
+    models.Base.metadata.create_all(bind=database.engine)
+    if database.engine.dialect.name == "postgresql":
+        for statement in upgrade_statements:
+            with database.engine.begin() as connection:
+                connection.execute(text(statement))
+
+
+def new_startup():
+    # The first request still opens a connection; nothing else touches the database
+    with database.engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+def main():
+    seed(1_000, courses_per_college=5)
+    run_migrations()
+    baseline = baseline_migration()
+    upgrade_statements = baseline.UPGRADE_STATEMENTS + baseline.TRIGRAM_STATEMENTS
+
+    for label, start_up in (
+        ("old: create_all + upgrades", lambda: old_startup(upgrade_statements)),
+        ("app.migrate at head", run_migrations),
+        ("new: no schema work", new_startup),
+    ):
+        timings = []
+        for _ in range(RUNS):
+            database.engine.dispose()
+            start = time.perf_counter()
+            start_up()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{label:28}: median {statistics.median(timings):7.1f} ms, max {max(timings):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Bulk import colleges and courses from an NDJSON or CSV file, the same way
+as POST /college/import (formats and validation in app/importer.py).
+
+Usage:
+    python import_colleges.py colleges.ndjson
+    python import_colleges.py courses.csv
+    python import_colleges.py --format csv - < courses.csv
+"""
+import argparse
+import sys
+import time
+
+from app.database import SessionLocal
+from app.importer import BATCH_SIZE, import_file
+from app.validation import ValidationError
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import colleges and courses")
+    parser.add_argument("path", help="NDJSON or CSV file, - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension, else ndjson")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="colleges per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        with (open(args.path, "rb") if args.path != "-" else sys.stdin.buffer) as source:
+            report = import_file(db, source, fmt, args.batch_size)
+    except ValidationError as e:
+        print(f"❌ Import failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Imported {report['colleges']} colleges and {report['courses']} courses in {elapsed:.1f}s")
+    if report["error_count"]:
+        print(f"⚠️  {report['error_count']} records skipped:")
+        for error in report["errors"]:
+            print(f"  line {error['line']}: {error['error']}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
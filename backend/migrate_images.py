@@ -0,0 +1,79 @@
+"""
+Migration script to move college_image_data blobs into the image store
+configured by IMAGE_STORE / IMAGE_STORE_DIR, generating the resized
+thumbnail/medium variants on the way. Safe to run more than once:
+already migrated colleges are skipped and identical images are stored once.
+
+Usage:
+    python migrate_images.py
+"""
+from sqlalchemy.orm import undefer
+
+from app import models
+from app.cache import bump_version, college_cache
+from app.database import SessionLocal
+from app.images import store_image
+
+BATCH_SIZE = 50
+
+
+def invalidate_caches(db):
+    """
+    Cached listing/detail payloads carry the old image columns: bump the
+    shared version so every worker drops them and rebuilds its indexes
+    """
+    cache_version = bump_version(db)
+    db.commit()
+    college_cache.invalidate(cache_version, lambda key: True)
+
+
+def migrate_images():
+    """Copy legacy image bytes into the image store and clear the column"""
+    db = SessionLocal()
+    migrated = 0
+
+    try:
+        while True:
+            # Each batch is committed, so the next query only sees unmigrated rows
+            colleges = (
+                db.query(models.College)
+                .options(undefer(models.College.college_image_data))
+                .filter(models.College.college_image_data.isnot(None))
+                .order_by(models.College.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not colleges:
+                break
+
+            for college in colleges:
+                data = college.college_image_data
+                key, variants = store_image(db, data)
+                college.image_hash = key
+                college.image_variants = variants
+                college.image_size = len(data)
+                college.college_image_mime = college.college_image_mime or "image/jpeg"
+                college.college_image_data = None
+
+            db.commit()
+            migrated += len(colleges)
+            print(f"Migrated {migrated} images...")
+
+        if migrated:
+            invalidate_caches(db)
+        print(f"✅ Migration completed: {migrated} images moved to the image store")
+    except Exception as e:
+        db.rollback()
+        if migrated:
+            # The batches committed before the failure are live already
+            invalidate_caches(db)
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Starting image migration...")
+    migrate_images()
+    print("Migration script completed.")
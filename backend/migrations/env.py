@@ -0,0 +1,53 @@
+"""
+Alembic environment: migrations run against the app's engine (DATABASE_URL),
+or the connection app.migrate passes in, with the models' metadata as the
+target for autogenerate.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from app import database, models
+
+# Inside the app (app.migrate passes a connection) its logging is left alone
+if context.config.config_file_name is not None and "connection" not in context.config.attributes:
+    fileConfig(context.config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=str(database.engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_on(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite cannot ALTER most things in place, batch mode recreates the table
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        run_on(connection)
+        return
+    with database.engine.connect() as connection:
+        run_on(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,252 @@
+"""Baseline: the schema the app used to build at startup
+
+Brings an empty database, or one created by any earlier version of the app,
+to the schema the app had when migrations were introduced. Missing tables
+are created as they were then (later revisions change them from there), and
+on Postgres the column, backfill and index upgrades that used to run on
+every startup bring older tables up to date. Every step is idempotent, so
+it is safe on a database that is already there.
+
+Written out rather than taken from app.models, so it stays fixed as the
+models change.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Full-text expressions of the search indexes, as app.search.COLLEGE_TSVECTOR
+# and COURSE_TSVECTOR were when this revision was written
+COLLEGE_TSVECTOR = (
+    "to_tsvector('english', coalesce(college_name, '') || ' ' || coalesce(stream, '') || ' ' "
+    "|| coalesce(address, '') || ' ' || coalesce(about, ''))"
+)
+COURSE_TSVECTOR = "to_tsvector('english', coalesce(course_name, '') || ' ' || coalesce(course_about, ''))"
+
+COURSE_TOTAL_FEE_SQL = " + ".join(f"COALESCE(sem{i}_fee, 0)" for i in range(1, 9))
+COURSE_YEAR_FEES_SQL = ", ".join(
+    f"year{y}_fee = CASE WHEN sem{2 * y - 1}_fee IS NULL AND sem{2 * y}_fee IS NULL THEN NULL "
+    f"ELSE COALESCE(sem{2 * y - 1}_fee, 0) + COALESCE(sem{2 * y}_fee, 0) END"
+    for y in range(1, 5)
+)
+
+# Columns, backfills and indexes added to existing databases before migrations
+UPGRADE_STATEMENTS = [
+    # Listing: total fee per course for budget filtering and fee sorting
+    "ALTER TABLE courses_1 ADD COLUMN IF NOT EXISTS total_fee DOUBLE PRECISION",
+    f"UPDATE courses_1 SET total_fee = {COURSE_TOTAL_FEE_SQL} WHERE total_fee IS NULL",
+    # Listing: indexes for filters, sorting and keyset pagination
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_name_id ON colleges_1 (college_name, id)",
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_stream ON colleges_1 (stream)",
+    "CREATE INDEX IF NOT EXISTS ix_courses_1_college_id ON courses_1 (college_id)",
+    "CREATE INDEX IF NOT EXISTS ix_courses_1_category_total_fee ON courses_1 (category, total_fee)",
+    # Image metadata so read paths never load college_image_data
+    "ALTER TABLE colleges_1 ADD COLUMN IF NOT EXISTS image_size INTEGER",
+    "ALTER TABLE colleges_1 ADD COLUMN IF NOT EXISTS image_hash VARCHAR(64)",
+    """UPDATE colleges_1
+       SET image_size = octet_length(college_image_data),
+           image_hash = encode(sha256(college_image_data), 'hex')
+       WHERE college_image_data IS NOT NULL AND image_hash IS NULL""",
+    "ALTER TABLE colleges_1 ADD COLUMN IF NOT EXISTS image_variants VARCHAR(50)",
+    # Search: full-text over colleges and courses
+    f"CREATE INDEX IF NOT EXISTS ix_colleges_1_search ON colleges_1 USING gin ({COLLEGE_TSVECTOR})",
+    f"CREATE INDEX IF NOT EXISTS ix_courses_1_search ON courses_1 USING gin ({COURSE_TSVECTOR})",
+    # Fee aggregates: per-year course fees and per-college min/max/median total fee
+    *[f"ALTER TABLE courses_1 ADD COLUMN IF NOT EXISTS year{y}_fee DOUBLE PRECISION" for y in range(1, 5)],
+    f"""UPDATE courses_1 SET {COURSE_YEAR_FEES_SQL}
+       WHERE year1_fee IS NULL AND year2_fee IS NULL AND year3_fee IS NULL AND year4_fee IS NULL""",
+    *[f"ALTER TABLE colleges_1 ADD COLUMN IF NOT EXISTS {c}_total_fee DOUBLE PRECISION" for c in ("min", "max", "median")],
+    """UPDATE colleges_1 c
+       SET min_total_fee = s.min_fee, max_total_fee = s.max_fee, median_total_fee = s.median_fee
+       FROM (
+           SELECT college_id, min(total_fee) AS min_fee, max(total_fee) AS max_fee,
+                  percentile_cont(0.5) WITHIN GROUP (ORDER BY total_fee) AS median_fee
+           FROM courses_1 WHERE total_fee IS NOT NULL GROUP BY college_id
+       ) s
+       WHERE s.college_id = c.id AND c.min_total_fee IS NULL""",
+    """INSERT INTO college_fee_stats (college_id, category, course_count, min_total_fee, max_total_fee, median_total_fee)
+       SELECT college_id, category, count(*), min(total_fee), max(total_fee),
+              percentile_cont(0.5) WITHIN GROUP (ORDER BY total_fee)
+       FROM courses_1
+       WHERE college_id IS NOT NULL AND category IS NOT NULL AND total_fee IS NOT NULL
+       GROUP BY college_id, category
+       ON CONFLICT (college_id, category) DO NOTHING""",
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_min_total_fee_id ON colleges_1 (min_total_fee, id)",
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_max_total_fee ON colleges_1 (max_total_fee)",
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_fee_sort_key_id ON colleges_1 (COALESCE(min_total_fee, 1e18), id)",
+    # Like counts: counted once when the column is added, then maintained from like_events
+    """DO $$
+       BEGIN
+           IF NOT EXISTS (
+               SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'colleges_1' AND column_name = 'like_count'
+           ) THEN
+               ALTER TABLE colleges_1 ADD COLUMN like_count INTEGER NOT NULL DEFAULT 0;
+               UPDATE colleges_1 c SET like_count = s.likes
+               FROM (SELECT college_id, count(*) AS likes FROM liked_colleges GROUP BY college_id) s
+               WHERE s.college_id = c.id;
+           END IF;
+       END $$""",
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_like_count_id ON colleges_1 (like_count, id)",
+]
+
+# Optional: the database user may not be allowed to create extensions. Without
+# pg_trgm, name substring filters scan and search runs without typo tolerance
+# (see app.search), so these are skipped with a warning rather than failing.
+TRIGRAM_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Listing: name substring search (ILIKE '%q%')
+    "CREATE INDEX IF NOT EXISTS ix_colleges_1_name_trgm ON colleges_1 USING gin (college_name gin_trgm_ops)",
+    # Search: typo tolerance on college and course names
+    "CREATE INDEX IF NOT EXISTS ix_courses_1_name_trgm ON courses_1 USING gin (course_name gin_trgm_ops)",
+]
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+def create_tables(existing):
+    """Create the tables missing from `existing` (table names), with their indexes"""
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("username", sa.String(100), nullable=False),
+            sa.Column("email", sa.String(150), nullable=False),
+            sa.Column("password_hash", sa.String(255), nullable=False),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "colleges_1" not in existing:
+        op.create_table(
+            "colleges_1",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("college_name", sa.String(200), nullable=False),
+            sa.Column("address", sa.String(300)),
+            sa.Column("about", sa.Text),
+            sa.Column("stream", sa.String(100)),
+            sa.Column("price_range", sa.String(100)),
+            sa.Column("college_image_data", sa.LargeBinary),
+            sa.Column("college_image_mime", sa.String(50)),
+            sa.Column("image_size", sa.Integer),
+            sa.Column("image_hash", sa.String(64)),
+            sa.Column("image_variants", sa.String(50)),
+            sa.Column("min_total_fee", sa.Float),
+            sa.Column("max_total_fee", sa.Float),
+            sa.Column("median_total_fee", sa.Float),
+            sa.Column("like_count", sa.Integer, nullable=False, server_default="0"),
+        )
+        op.create_index("ix_colleges_1_id", "colleges_1", ["id"])
+        op.create_index("ix_colleges_1_stream", "colleges_1", ["stream"])
+        op.create_index("ix_colleges_1_name_id", "colleges_1", ["college_name", "id"])
+        op.create_index("ix_colleges_1_min_total_fee_id", "colleges_1", ["min_total_fee", "id"])
+        op.create_index("ix_colleges_1_max_total_fee", "colleges_1", ["max_total_fee"])
+        op.create_index("ix_colleges_1_like_count_id", "colleges_1", ["like_count", "id"])
+        op.create_index(
+            "ix_colleges_1_fee_sort_key_id", "colleges_1", [sa.text("coalesce(min_total_fee, 1e18)"), "id"]
+        )
+
+    if "courses_1" not in existing:
+        op.create_table(
+            "courses_1",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("college_id", sa.Integer, sa.ForeignKey("colleges_1.id", ondelete="CASCADE")),
+            sa.Column("course_name", sa.String(150), nullable=False),
+            sa.Column("course_about", sa.Text),
+            sa.Column("category", sa.String(100)),
+            *[sa.Column(f"sem{i}_fee", sa.Float) for i in range(1, 9)],
+            sa.Column("total_fee", sa.Float),
+            *[sa.Column(f"year{y}_fee", sa.Float) for y in range(1, 5)],
+        )
+        op.create_index("ix_courses_1_id", "courses_1", ["id"])
+        op.create_index("ix_courses_1_college_id", "courses_1", ["college_id"])
+        op.create_index("ix_courses_1_category_total_fee", "courses_1", ["category", "total_fee"])
+
+    if "college_fee_stats" not in existing:
+        op.create_table(
+            "college_fee_stats",
+            sa.Column(
+                "college_id", sa.Integer, sa.ForeignKey("colleges_1.id", ondelete="CASCADE"), primary_key=True
+            ),
+            sa.Column("category", sa.String(100), primary_key=True),
+            sa.Column("course_count", sa.Integer, nullable=False),
+            sa.Column("min_total_fee", sa.Float, nullable=False),
+            sa.Column("max_total_fee", sa.Float, nullable=False),
+            sa.Column("median_total_fee", sa.Float, nullable=False),
+        )
+        op.create_index(
+            "ix_college_fee_stats_category_min", "college_fee_stats", ["category", "min_total_fee", "college_id"]
+        )
+        op.create_index("ix_college_fee_stats_category_max", "college_fee_stats", ["category", "max_total_fee"])
+
+    for table, constraint in (("liked_colleges", "unique_user_college"), ("compare_colleges", "unique_user_compare")):
+        if table not in existing:
+            op.create_table(
+                table,
+                sa.Column("id", sa.Integer, primary_key=True),
+                sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+                sa.Column(
+                    "college_id", sa.Integer, sa.ForeignKey("colleges_1.id", ondelete="CASCADE"), nullable=False
+                ),
+                sa.UniqueConstraint("user_id", "college_id", name=constraint),
+            )
+            op.create_index(f"ix_{table}_id", table, ["id"])
+
+    if "like_events" not in existing:
+        op.create_table(
+            "like_events",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("college_id", sa.Integer, nullable=False),
+            sa.Column("delta", sa.SmallInteger, nullable=False),
+        )
+
+    if "image_blobs" not in existing:
+        op.create_table(
+            "image_blobs",
+            sa.Column("key", sa.String(80), primary_key=True),
+            sa.Column("data", sa.LargeBinary, nullable=False),
+        )
+
+    if "cache_versions" not in existing:
+        op.create_table(
+            "cache_versions",
+            sa.Column("name", sa.String(50), primary_key=True),
+            sa.Column("version", sa.Integer, nullable=False),
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    create_tables(set(sa.inspect(bind).get_table_names()))
+    if bind.dialect.name != "postgresql":
+        return
+
+    # course_about was VARCHAR(500) in early databases
+    op.execute("ALTER TABLE courses_1 ALTER COLUMN course_about TYPE TEXT")
+    for statement in UPGRADE_STATEMENTS:
+        op.execute(statement)
+
+    for statement in TRIGRAM_STATEMENTS:
+        # A savepoint each, so a failed optional step leaves the transaction usable
+        savepoint = bind.begin_nested()
+        try:
+            bind.execute(sa.text(statement))
+            savepoint.commit()
+        except sa.exc.DBAPIError as e:
+            savepoint.rollback()
+            # The rest need the extension too
+            logger.warning("Skipped the pg_trgm steps, %r failed: %s", statement[:60], e.orig)
+            break
+
+
+def downgrade():
+    raise NotImplementedError("The baseline cannot be downgraded")
@@ -0,0 +1,74 @@
+"""Indexes for the hot read paths and ON DELETE CASCADE foreign keys
+
+- liked_colleges and compare_colleges get an index on college_id. Lookups
+  by user_id are served by the unique (user_id, college_id) constraints.
+- Every foreign key to colleges_1 and users becomes ON DELETE CASCADE, so
+  deleting a college or user is one statement (the relationships use
+  passive_deletes). Databases created before the models declared it may
+  still have plain foreign keys. On SQLite the baseline's foreign keys
+  already cascade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_liked_colleges_college_id", "liked_colleges", "college_id"),
+    ("ix_compare_colleges_college_id", "compare_colleges", "college_id"),
+]
+
+# (table, column, referenced table)
+CASCADE_FOREIGN_KEYS = [
+    ("courses_1", "college_id", "colleges_1"),
+    ("college_fee_stats", "college_id", "colleges_1"),
+    ("liked_colleges", "user_id", "users"),
+    ("liked_colleges", "college_id", "colleges_1"),
+    ("compare_colleges", "user_id", "users"),
+    ("compare_colleges", "college_id", "colleges_1"),
+]
+
+# Replace the column's foreign key unless it already cascades. NOT VALID then
+# VALIDATE keeps the strong lock short on big tables.
+CASCADE_SQL = """
+DO $$
+DECLARE
+    existing record;
+BEGIN
+    SELECT con.conname, con.confdeltype INTO existing
+    FROM pg_constraint con
+    JOIN pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1]
+    WHERE con.conrelid = '{table}'::regclass AND con.contype = 'f' AND att.attname = '{column}';
+
+    IF existing.confdeltype = 'c' THEN
+        RETURN;
+    END IF;
+    IF existing.conname IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT %I', existing.conname);
+    END IF;
+    ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey
+        FOREIGN KEY ({column}) REFERENCES {referenced} (id) ON DELETE CASCADE NOT VALID;
+    ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey;
+END $$
+"""
+
+
+def upgrade():
+    for name, table, column in INDEXES:
+        # IF NOT EXISTS: databases created by create_all before migrations may have them
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+    if op.get_bind().dialect.name == "postgresql":
+        for table, column, referenced in CASCADE_FOREIGN_KEYS:
+            op.execute(CASCADE_SQL.format(table=table, column=column, referenced=referenced))
+
+
+def downgrade():
+    # The cascading foreign keys stay: the models declare them
+    for name, _, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")